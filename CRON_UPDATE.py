@@ -1,9 +1,16 @@
+from src import maintenance, rollup
 from src.leistung import Leistung
-from src.ertrag import update_ertrag
+from src.ertrag import PATH_ERTRAG, update_ertrag
 
-leistung = Leistung()
-for s in  ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]:
-    leistung.download_days(s,365)
-leistung.optimize()
+STANDORTE = ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]
 
-update_ertrag()
\ No newline at end of file
+if __name__ == "__main__":
+    leistung = Leistung()
+    leistung.download_sites(STANDORTE, 365)
+    # Tage ohne Rollups (Altbestand, fehlgeschlagene Rollups) nachziehen
+    leistung.update_rollups(STANDORTE)
+    leistung.optimize()
+
+    update_ertrag()
+    maintenance.run(PATH_ERTRAG)
+    rollup.optimize()
@@ -0,0 +1,82 @@
+"""
+Wartungsbefehle für die Datenbestände.
+
+    uv run MAINTENANCE.py reingest [--standort badboll ...] [--processes N]
+        Baut die Delta-Tabelle aus dem Rohdaten-Archiv (data/raw/) neu auf.
+
+    uv run MAINTENANCE.py rollup [--standort badboll ...] [--missing]
+        Berechnet die Tages- und Monats-Rollups, die Tageskurven der
+        Gesamtleistung und die Fehler-Kennzahlen (data/rollup/) aus der
+        Delta-Tabelle neu, z. B. nach einem reingest. Mit --missing nur für
+        die Tage, die laut Manifest noch keine Rollups haben (läuft auch im
+        CRON_UPDATE).
+
+    uv run MAINTENANCE.py optimize [--dry-run]
+        Kompaktiert Partitionen mit vielen kleinen Dateien und räumt alte
+        Dateien auf (Retention siehe src/maintenance.py), für die Delta-Tabelle
+        und die Rollup-Tabellen; --dry-run zeigt nur den Plan.
+
+    uv run MAINTENANCE.py migrate-schema
+        Schreibt die Delta-Tabelle ins aktuelle Schema um (int16/int8/float32,
+        Spalten date/month, partitioniert nach standort/month) und gibt Größe
+        und Scan-Dauer vorher/nachher aus. Läuft bei Bedarf auch automatisch.
+
+    uv run MAINTENANCE.py convert-layout {long,wide}
+        Schreibt die Delta-Tabelle ins long- (eine Zeile je Kanal) oder
+        wide-Layout (eine Zeile je Zeitpunkt und WR) um.
+
+    uv run MAINTENANCE.py update-ertrag [--standort badboll ...] [--hist]
+        Aktualisiert die Ertragsdaten; mit --hist wird days_hist.js in jedem
+        Fall neu geladen und übernommen.
+"""
+import argparse
+
+from src import rollup
+from src.ertrag import update_ertrag
+from src.leistung import LAYOUT_LONG, LAYOUT_WIDE, Leistung
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reingest = commands.add_parser("reingest", help="Delta-Tabelle aus dem Rohdaten-Archiv neu aufbauen")
+    reingest.add_argument("--standort", action="append", help="nur diese(n) Standort(e), mehrfach möglich")
+    reingest.add_argument("--processes", type=int, default=None, help="Anzahl Prozesse (Standard: CPUs)")
+
+    rollups = commands.add_parser("rollup", help="Tages-/Monats-Rollups neu berechnen")
+    rollups.add_argument("--standort", action="append", help="nur diese(n) Standort(e), mehrfach möglich")
+    rollups.add_argument("--missing", action="store_true", help="nur Tage ohne Rollups laut Manifest")
+
+    optimize = commands.add_parser("optimize", help="Partitionen kompaktieren und aufräumen")
+    optimize.add_argument("--dry-run", action="store_true", help="nur planen, nichts ändern")
+
+    commands.add_parser("migrate-schema", help="Delta-Tabelle ins aktuelle Schema/Partitionierung umschreiben")
+
+    layout = commands.add_parser("convert-layout", help="Delta-Tabelle ins long- oder wide-Layout umschreiben")
+    layout.add_argument("layout", choices=[LAYOUT_LONG, LAYOUT_WIDE])
+
+    ertrag = commands.add_parser("update-ertrag", help="Ertragsdaten aktualisieren")
+    ertrag.add_argument("--standort", action="append", help="nur diese(n) Standort(e), mehrfach möglich")
+    ertrag.add_argument("--hist", action="store_true", help="days_hist.js unabhängig vom gemerkten Stand neu laden")
+
+    args = parser.parse_args()
+    if args.command == "reingest":
+        Leistung().reingest(standorte=args.standort, processes=args.processes)
+    elif args.command == "rollup" and args.missing:
+        Leistung().update_rollups(standorte=args.standort)
+    elif args.command == "rollup":
+        Leistung().rebuild_rollups(standorte=args.standort)
+    elif args.command == "optimize":
+        Leistung().optimize(dry_run=args.dry_run)
+        rollup.optimize(dry_run=args.dry_run)
+    elif args.command == "migrate-schema":
+        Leistung().migrate_schema()
+    elif args.command == "convert-layout":
+        Leistung().convert_layout(args.layout)
+    elif args.command == "update-ertrag":
+        update_ertrag(standorte=args.standort, force_hist=args.hist)
+
+
+if __name__ == "__main__":
+    main()
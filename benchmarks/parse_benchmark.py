@@ -0,0 +1,228 @@
+"""
+Benchmark der Parser für die Datenlogger-Dateien.
+
+Vergleicht die vektorisierten Parser mit den bisherigen Implementierungen
+(hier als Referenz eingefroren) auf synthetischen, aber realistisch großen
+Dateien und prüft, dass beide dasselbe DataFrame liefern.
+
+Aufruf (im Projektverzeichnis):
+    uv run python -m benchmarks.parse_benchmark
+"""
+import datetime as dt
+import random
+import re
+import timeit
+from datetime import datetime
+from io import StringIO
+from typing import List, Tuple
+
+import pandas as pd
+
+from src.ertrag import parse_js_text
+from src.leistung import Leistung, ParseError
+
+
+def _legacy_column_metadata(n_cols: int, wr_label: str) -> List[Tuple[str, int]]:
+    if n_cols < 2:
+        raise ValueError(f"{wr_label}: Ungültige Anzahl an Spalten ({n_cols})")
+    n_strings = (n_cols - 2) // 2
+    meta = [("P", -1)] + [("P", i) for i in range(1, n_strings + 1)] + [("sum", -1)]
+    meta += [("Udc", i) for i in range(1, n_strings + 1)]
+    if (n_cols - 2) % 2 == 1:
+        meta.append(("T", -1))
+    return meta
+
+
+def legacy_parse_min_js(text: str, standort: str, url: str = "") -> pd.DataFrame:
+    """Bisheriger Parser aus `Leistung.download_day_long` (Stand vor der Vektorisierung)."""
+    matches = re.findall(r'="([^"]+)"', text)
+    if not matches:
+        raise ParseError(f"ParseError: regex {url}")
+
+    raw_data = "\n".join(matches).replace("|", ",")
+    try:
+        raw_df = pd.read_csv(StringIO(raw_data), sep=",", header=None)
+    except Exception:
+        raise ParseError(f"ParseError: CSV {url}")
+    if raw_df.shape[1] < 2:
+        raise ParseError(f"ParseError: Shape {url}")
+
+    try:
+        raw_df[0] = pd.to_datetime(raw_df[0], format="%d.%m.%y %H:%M:%S")
+        # Ensure second-level sampling (drop sub-second precision)
+        raw_df[0] = raw_df[0]
+    except Exception as e:
+        raise ParseError(f"ParseError: Time {e} {url}")
+
+    raw_df.columns = ["Datetime"] + [f"WR{i + 1}" for i in range(len(raw_df.columns) - 1)]
+
+    long_parts: List[pd.DataFrame] = []
+    for wr_col in raw_df.columns[1:]:
+        col_series = raw_df[wr_col].astype(str)
+        split_df = col_series.str.split(";", expand=True)
+        split_df = split_df.apply(pd.to_numeric, errors="coerce")
+        split_df.index = raw_df.index
+
+        meta = _legacy_column_metadata(split_df.shape[1], wr_col)
+        if len(meta) != split_df.shape[1]:
+            raise ParseError(
+                f"Meta-Länge stimmt nicht mit Spaltenanzahl überein für {wr_col} "
+                f"({len(meta)} != {split_df.shape[1]})"
+            )
+
+        melted = split_df.reset_index().melt(id_vars="index", var_name="col_idx", value_name="value")
+
+        wr_idx_match = re.search(r"(\d+)", wr_col)
+        if not wr_idx_match:
+            raise ParseError(f"Konnte WR-Index nicht aus Spaltennamen '{wr_col}' extrahieren.")
+        wr_idx = int(wr_idx_match.group(1)) if wr_idx_match else None
+
+        def map_meta(col_idx: int) -> Tuple[int, str]:
+            col_idx = int(col_idx)
+            sensor, stringnum = meta[col_idx]
+            return stringnum, sensor
+
+        mapped = melted["col_idx"].apply(map_meta)
+        melted["string"] = mapped.apply(lambda x: x[0])
+        melted["sensor"] = mapped.apply(lambda x: x[1])
+        melted["wr"] = wr_idx
+        melted["Datetime"] = melted["index"].map(raw_df["Datetime"])
+
+        part = melted[["Datetime", "wr", "string", "sensor", "value"]].copy()
+        part["wr"] = part["wr"].astype(int)
+        part["string"] = part["string"].astype(int)
+        part["value"] = pd.to_numeric(part["value"], errors="coerce")
+        long_parts.append(part)
+
+    if not long_parts:
+        raise ParseError("Keine Wechselrichter-Spalten verarbeitet (keine Teile erzeugt).")
+
+    result = pd.concat(long_parts, ignore_index=True)
+    result = result.drop_duplicates().reset_index(drop=True)
+    result["standort"] = standort
+    return result
+
+
+def _legacy_parse_date(ddmm_string):
+    """Konvertiert 'dd.mm.yy' oder 'dd.mm.yyyy' -> 'YYYY-MM-DD' (ISO)"""
+    s = ddmm_string.strip()
+    try:
+        if re.match(r'^\d{2}\.\d{2}\.\d{2}$', s):
+            return datetime.strptime(s, '%d.%m.%y').date().isoformat()
+        else:
+            return datetime.strptime(s, '%d.%m.%Y').date().isoformat()
+    except Exception:
+        # falls unbekanntes Format: original zurückgeben
+        return s
+
+
+def legacy_parse_js_text(text, standort='Esslingen'):
+    """Bisheriger Parser aus `src.ertrag.parse_js_text` (Stand vor der Vektorisierung)."""
+    rows = []
+    # alle "..." Inhalte extrahieren (darin sind die records)
+    matches = re.findall(r'"([^"]+)"', text)
+    for m in matches:
+        parts = m.split('|')
+        if not parts:
+            continue
+        date_iso = _legacy_parse_date(parts[0])
+        # alle folgenden tokens sind "value;0" - wir nehmen nur den value-Teil vor dem ';'
+        for i, token in enumerate(parts[1:], start=1):
+            token = token.strip()
+            if token == '':
+                continue
+            val = token.split(';')[0]
+            # versuche int, sonst float, sonst None
+            try:
+                val_num = int(val)
+            except ValueError:
+                try:
+                    val_num = float(val.replace(',', '.'))
+                except Exception:
+                    val_num = None
+            rows.append({
+                'date': date_iso,
+                'standort': standort,
+                'wr': i,
+                'value': val_num
+            })
+    df = pd.DataFrame(rows, columns=['date', 'standort', 'wr', 'value'])
+    # date in datetime umwandeln (wenn möglich) und sortieren (neueste zuerst)
+    try:
+        df['date'] = pd.to_datetime(df['date'])
+        df["date"] = df["date"].dt.date
+        df = df.sort_values(['date', 'wr'], ascending=[False, True]).reset_index(drop=True)
+    except Exception:
+        pass
+    return df
+
+
+def synthetic_min_js(day: dt.date, n_wr: int = 3, n_strings: int = 3, step_minutes: int = 5, seed: int = 0) -> str:
+    """Erzeugt eine volle Tagesdatei im min*.js-Format (neueste Zeile zuerst)."""
+    rng = random.Random(seed)
+    lines = []
+    t0 = dt.datetime.combine(day, dt.time())
+    for i in range(24 * 60 // step_minutes):
+        ts = t0 + dt.timedelta(minutes=i * step_minutes)
+        cells = []
+        for _ in range(n_wr):
+            p_strings = [rng.randint(0, 4000) for _ in range(n_strings)]
+            u_strings = [rng.randint(200, 650) for _ in range(n_strings)]
+            values = [sum(p_strings), *p_strings, rng.randint(0, 60000), *u_strings, rng.randint(15, 65)]
+            cells.append(";".join(map(str, values)))
+        lines.append(f'm[mi++]="{ts:%d.%m.%y %H:%M:%S}|' + "|".join(cells) + '"')
+    return "\n".join(reversed(lines)) + "\n"
+
+
+def _bench(label: str, old, new, number: int) -> None:
+    t_old = min(timeit.repeat(old, number=number, repeat=5)) / number
+    t_new = min(timeit.repeat(new, number=number, repeat=5)) / number
+    print(f"{label}: alt {t_old * 1000:8.2f} ms | neu {t_new * 1000:8.2f} ms | Faktor {t_old / t_new:5.1f}x")
+
+
+def bench_min_js() -> None:
+    leistung = Leistung.__new__(Leistung)  # ohne Delta-Tabelle anzulegen
+    for n_wr, n_strings in [(1, 2), (3, 3), (8, 3)]:
+        text = synthetic_min_js(dt.date(2025, 6, 21), n_wr=n_wr, n_strings=n_strings)
+        expected = legacy_parse_min_js(text, "badboll")
+        actual = leistung._parse_min_js(text, "badboll")
+        # alt: int64, wenn zufällig alle Werte ganzzahlig sind; Schema ist float
+        expected["value"] = expected["value"].astype("float64")
+        pd.testing.assert_frame_equal(actual, expected)
+        _bench(
+            f"min*.js  {n_wr} WR x {n_strings} Strings ({len(expected):>6} Zeilen)",
+            lambda: legacy_parse_min_js(text, "badboll"),
+            lambda: leistung._parse_min_js(text, "badboll"),
+            number=5,
+        )
+
+
+
+def synthetic_days_js(last_day: dt.date, n_days: int = 3650, n_wr: int = 3, seed: int = 0) -> str:
+    """Erzeugt eine days_hist.js mit `n_days` Tagen (neuester Tag zuerst)."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n_days):
+        day = last_day - dt.timedelta(days=i)
+        cells = [f"{rng.randint(0, 60000)};0" for _ in range(n_wr)]
+        lines.append(f'da[dx++]="{day:%d.%m.%y}|' + "|".join(cells) + '"')
+    return "\n".join(lines) + "\n"
+
+
+def bench_days_js() -> None:
+    for n_days, n_wr in [(30, 3), (3650, 3), (3650, 8)]:
+        text = synthetic_days_js(dt.date(2025, 6, 21), n_days=n_days, n_wr=n_wr)
+        expected = legacy_parse_js_text(text, "badboll")
+        actual = parse_js_text(text, "badboll")
+        pd.testing.assert_frame_equal(actual, expected)
+        _bench(
+            f"days*.js {n_days:>4} Tage x {n_wr} WR ({len(expected):>6} Zeilen)",
+            lambda: legacy_parse_js_text(text, "badboll"),
+            lambda: parse_js_text(text, "badboll"),
+            number=5,
+        )
+
+
+if __name__ == "__main__":
+    bench_min_js()
+    bench_days_js()
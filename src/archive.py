@@ -0,0 +1,70 @@
+import datetime as dt
+import os
+import re
+import tempfile
+from typing import List
+
+import zstandard
+
+PATH_ARCHIVE = "data/raw/"
+ZSTD_LEVEL = 10
+
+# min<yymmdd>.js, days.js, days_hist.js
+KINDS = ("min", "days", "days_hist")
+
+
+def _path(standort: str, kind: str, date: dt.date) -> str:
+    if kind not in KINDS:
+        raise ValueError(f"Unbekannte Art '{kind}'")
+    return os.path.join(PATH_ARCHIVE, standort, kind, f"{date:%Y}", f"{date:%Y-%m-%d}.js.zst")
+
+
+def store(standort: str, kind: str, date: dt.date, payload: bytes) -> str:
+    """
+    Legt eine heruntergeladene Datei zstd-komprimiert im Archiv ab.
+
+    Schlüssel ist (standort, kind, date): bei "min" der Tag der Messwerte,
+    bei "days"/"days_hist" der Abruftag (ein Stand pro Tag, der letzte gewinnt).
+    Geschrieben wird atomar über eine temporäre Datei.
+    """
+    path = _path(standort, kind, date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def load(standort: str, kind: str, date: dt.date) -> str:
+    """Liest eine archivierte Datei als Text."""
+    with open(_path(standort, kind, date), "rb") as f:
+        payload = zstandard.ZstdDecompressor().decompress(f.read())
+    return payload.decode("utf-8", errors="replace")
+
+
+def exists(standort: str, kind: str, date: dt.date) -> bool:
+    return os.path.exists(_path(standort, kind, date))
+
+
+def list_dates(standort: str, kind: str = "min") -> List[dt.date]:
+    """Alle archivierten Tage eines Standorts, aufsteigend sortiert."""
+    root = os.path.join(PATH_ARCHIVE, standort, kind)
+    dates = []
+    for _, _, files in os.walk(root):
+        for name in files:
+            match = re.fullmatch(r"(\d{4}-\d{2}-\d{2})\.js\.zst", name)
+            if match:
+                dates.append(dt.date.fromisoformat(match.group(1)))
+    return sorted(dates)
+
+
+def list_standorte() -> List[str]:
+    if not os.path.isdir(PATH_ARCHIVE):
+        return []
+    return sorted(d for d in os.listdir(PATH_ARCHIVE) if os.path.isdir(os.path.join(PATH_ARCHIVE, d)))
@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from typing import Callable, Iterable, Optional, Union
+
+CACHE_SIZE = 32  # Einträge je Funktion
+MAX_BYTES = 256 * 1024**2  # geschätzte Gesamtgröße je Funktion
+
+
+def table_version(path: str) -> Optional[int]:
+    """
+    Stand einer Delta-Tabelle ohne sie zu öffnen: Jeder Commit legt eine
+    Datei in `_delta_log` an und ändert damit dessen mtime. None, wenn es
+    die Tabelle (noch) nicht gibt.
+    """
+    try:
+        return os.stat(os.path.join(path, "_delta_log")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _size(value) -> int:
+    """Geschätzter Speicherbedarf eines Ergebnisses in Bytes."""
+    if hasattr(value, "estimated_size"):  # polars
+        return int(value.estimated_size())
+    if hasattr(value, "memory_usage"):  # pandas
+        usage = value.memory_usage(index=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes"):  # numpy
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+def timed_cache(
+    ttl: Optional[float] = None,
+    daily: bool = False,
+    tables: Union[str, Iterable[str], None] = None,
+    maxsize: int = CACHE_SIZE,
+    max_bytes: int = MAX_BYTES,
+) -> Callable:
+    """
+    Wie `functools.lru_cache`, aber Einträge verfallen:
+
+    - `ttl`: nach so vielen Sekunden,
+    - `daily`: um Mitternacht (lokale Zeit), für Werte mit Bezug auf "heute",
+    - `tables`: sobald sich eine der Delta-Tabellen geändert hat (`table_version`),
+      z. B. nach dem nächtlichen CRON_UPDATE in einem anderen Prozess.
+
+    Verdrängt wird der am längsten nicht genutzte Eintrag, sobald mehr als
+    `maxsize` Einträge oder mehr als `max_bytes` (geschätzt) im Cache liegen.
+    Wie bei `lru_cache` gehört bei Methoden `self` zum Schlüssel; das
+    Ergebnis wird geteilt und darf nicht verändert werden.
+    """
+    if isinstance(tables, str):
+        tables = [tables]
+    tables = list(tables or [])
+
+    def decorator(func: Callable) -> Callable:
+        # Schlüssel -> (Ergebnis, Zeitpunkt, Tag, Tabellenstand, Größe)
+        entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0, "bytes": 0}
+
+        def state():
+            return date.today() if daily else None, tuple(table_version(p) for p in tables)
+
+        def valid(entry, day, versions, now) -> bool:
+            _, created, entry_day, entry_versions, _ = entry
+            if ttl is not None and now - created > ttl:
+                return False
+            return entry_day == day and entry_versions == versions
+
+        def evict(key) -> None:
+            stats["bytes"] -= entries.pop(key)[4]
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items()))
+            day, versions = state()
+            with lock:
+                entry = entries.get(key)
+                if entry is not None and valid(entry, day, versions, time.monotonic()):
+                    entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return entry[0]
+                stats["misses"] += 1
+
+            value = func(*args, **kwargs)
+            size = _size(value)
+            with lock:
+                if key in entries:
+                    evict(key)
+                entries[key] = (value, time.monotonic(), day, versions, size)
+                stats["bytes"] += size
+                while len(entries) > 1 and (len(entries) > maxsize or stats["bytes"] > max_bytes):
+                    evict(next(iter(entries)))
+            return value
+
+        def cache_clear() -> None:
+            with lock:
+                entries.clear()
+                stats.update(hits=0, misses=0, bytes=0)
+
+        def cache_info() -> dict:
+            with lock:
+                return {**stats, "entries": len(entries), "maxsize": maxsize, "max_bytes": max_bytes}
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        return wrapper
+
+    return decorator
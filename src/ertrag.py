@@ -1,8 +1,19 @@
 import re
-from datetime import datetime
+from datetime import date, datetime
 import pandas as pd
-import requests
+import polars as pl
 import os 
+from functools import partial
+
+from src import archive, fetch
+from src.manifest import Manifest
+
+# Ertrags-Speicher: Delta-Tabelle, partitioniert nach Standort und Jahr
+PATH_ERTRAG = "data/ertrag-table/"
+PATH_ERTRAG_SEED = "data/ertrag.parquet"  # bisherige Gesamtdatei, nur noch zum erstmaligen Befüllen
+ERTRAG_PARTITIONS = ["standort", "year"]
+ERTRAG_KEY = ["date", "standort", "wr"]
+ERTRAG_SCHEMA = {"date": pl.Date, "standort": pl.String, "wr": pl.Int64, "value": pl.Int64, "year": pl.Int32}
 
 
 def _parse_date(ddmm_string):
@@ -22,67 +33,213 @@ def parse_js_text(text, standort='Esslingen'):
     Parst Text mit Zeilen wie:
     da[dx++]="13.06.23|4500;0|1905;0|1668;0"
     -> DataFrame long format mit Spalten: date, standort, wr, value
-    wr wird als 'WR1','WR2',... bezeichnet.
+    wr ist die Position des Wechselrichters im Record (1, 2, ...).
+
+    Spaltenweise statt pro Record: ein Regex-Durchlauf, danach Split,
+    Explode sowie Zahlen- und Datumsumwandlung in Polars (siehe
+    benchmarks/parse_benchmark.py).
     """
-    rows = []
     # alle "..." Inhalte extrahieren (darin sind die records)
     matches = re.findall(r'"([^"]+)"', text)
-    for m in matches:
-        parts = m.split('|')
-        if not parts:
-            continue
-        date_iso = _parse_date(parts[0])
-        # alle folgenden tokens sind "value;0" - wir nehmen nur den value-Teil vor dem ';'
-        for i, token in enumerate(parts[1:], start=1):
-            token = token.strip()
-            if token == '':
-                continue
-            val = token.split(';')[0]
-            # versuche int, sonst float, sonst None
-            try:
-                val_num = int(val)
-            except ValueError:
-                try:
-                    val_num = float(val.replace(',', '.'))
-                except Exception:
-                    val_num = None
-            rows.append({
-                'date': date_iso,
-                'standort': standort,
-                'wr': i,
-                'value': val_num
-            })
-    df = pd.DataFrame(rows, columns=['date', 'standort', 'wr', 'value'])
-    # date in datetime umwandeln (wenn möglich) und sortieren (neueste zuerst)
-    try:
-        df['date'] = pd.to_datetime(df['date'])
-        df["date"] = df["date"].dt.date
-        df = df.sort_values(['date', 'wr'], ascending=[False, True]).reset_index(drop=True)
-    except Exception:
-        pass
+    if not matches:
+        return pd.DataFrame(columns=['date', 'standort', 'wr', 'value'])
+
+    parts = pl.Series("parts", matches).str.split("|")
+    long = (
+        pl.DataFrame({
+            "raw_date": parts.list.first().str.strip_chars(),
+            "token": parts.list.slice(1),
+            "wr": pl.int_ranges(1, parts.list.len(), dtype=pl.Int64, eager=True),
+        })
+        .explode("token", "wr")
+        # leere Tokens fallen weg, wr bleibt die Position im Record
+        .with_columns(pl.col("token").str.strip_chars())
+        .filter(pl.col("token").is_not_null() & (pl.col("token") != ""))
+        # alle Tokens sind "value;0" - wir nehmen nur den value-Teil vor dem ';'
+        .with_columns(
+            pl.col("token").str.split(";").list.first().str.strip_chars().str.replace_all(",", ".", literal=True)
+        )
+    )
+    is_int = long["token"].str.contains(r"^[+-]?\d+$").all()
+    value = pl.col("token").cast(pl.Int64 if is_int else pl.Float64, strict=False)
+    date_value = pl.when(pl.col("raw_date").str.len_chars() == 8).then(
+        pl.col("raw_date").str.to_date("%d.%m.%y", strict=False)
+    ).otherwise(pl.col("raw_date").str.to_date("%d.%m.%Y", strict=False))
+    long = long.select(date=date_value, raw_date="raw_date", standort=pl.lit(standort), wr="wr", value=value)
+
+    if long["date"].null_count():
+        # unbekanntes Datumsformat: unsortiert mit (ISO-)Strings wie bisher
+        df = long.drop("date").to_pandas().rename(columns={"raw_date": "date"})
+        df["date"] = df["date"].map(_parse_date)
+        return df
+    # sortieren (neueste zuerst)
+    df = long.drop("raw_date").sort(["date", "wr"], descending=[True, False], maintain_order=True).to_pandas()
+    df["date"] = df["date"].dt.date
     return df
 
 
-def update_ertrag():
-    standorte =  ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]
+def _archive_and_parse(text, standort, kind):
+    """Sichert den Abruf im Rohdaten-Archiv (ein Stand pro Tag) und parst ihn."""
+    archive.store(standort, kind, date.today(), text.encode("utf-8"))
+    return parse_js_text(text, standort=standort)
+
+
+def _to_store_frame(df: pd.DataFrame) -> pl.DataFrame:
+    """Bringt geparste Ertragsdaten ins Schema des Ertrags-Speichers (inkl. Partitionsspalte year)."""
+    return (
+        pl.from_pandas(df[["date", "standort", "wr", "value"]])
+        .with_columns(
+            pl.col("date").cast(pl.Date),
+            pl.col("standort").str.to_lowercase(),
+            pl.col("wr").cast(pl.Int64),
+            pl.col("value").round(0).cast(pl.Int64),
+        )
+        .with_columns(pl.col("date").dt.year().cast(pl.Int32).alias("year"))
+        .select(ERTRAG_SCHEMA.keys())
+    )
+
+
+def _create_store() -> None:
+    """Legt den Ertrags-Speicher an und übernimmt einmalig den Bestand aus data/ertrag.parquet."""
+    if os.path.exists(PATH_ERTRAG_SEED):
+        seed = _to_store_frame(pd.read_parquet(PATH_ERTRAG_SEED))
+    else:
+        seed = pl.DataFrame(schema=ERTRAG_SCHEMA)
+    seed.unique(subset=ERTRAG_KEY, keep="first", maintain_order=True).write_delta(
+        PATH_ERTRAG, mode="overwrite", delta_write_options={"partition_by": ERTRAG_PARTITIONS}
+    )
+
+
+def _partition_predicate(df: pl.DataFrame) -> str:
+    """Schränkt den MERGE auf die betroffenen (standort, year)-Partitionen ein."""
+    parts = df.select("standort", "year").unique().sort("standort", "year")
+    clauses = [
+        f"(t.standort = '{standort}' AND t.year IN ({', '.join(str(y) for y in years)}))"
+        for standort, years in parts.group_by("standort", maintain_order=True).agg("year").iter_rows()
+    ]
+    return "(" + " OR ".join(clauses) + ")"
+
+
+def ensure_store() -> None:
+    """Legt den Ertrags-Speicher an, falls es ihn noch nicht gibt."""
+    if not os.path.exists(os.path.join(PATH_ERTRAG, "_delta_log")):
+        _create_store()
+
+
+def upsert_ertrag(df: pd.DataFrame) -> None:
+    """
+    Schreibt neue Ertragsdaten per MERGE auf (date, standort, wr) in den
+    Ertrags-Speicher: vorhandene Tage werden aktualisiert, neue eingefügt.
+    Gelesen und neu geschrieben werden nur Dateien der betroffenen
+    (standort, year)-Partitionen, nicht die gesamte Historie.
+    """
+    ensure_store()
+    source = _to_store_frame(df).unique(subset=ERTRAG_KEY, keep="first", maintain_order=True)
+    if source.is_empty():
+        return
+    # year ist durch date bestimmt, hilft aber beim Zuordnen zu den Partitionen
+    key_match = " AND ".join(f"t.{c} = s.{c}" for c in dict.fromkeys(ERTRAG_PARTITIONS + ERTRAG_KEY))
+    (
+        source.write_delta(
+            PATH_ERTRAG,
+            mode="merge",
+            delta_merge_options={
+                "predicate": f"{_partition_predicate(source)} AND {key_match}",
+                "source_alias": "s",
+                "target_alias": "t",
+            },
+        )
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute()
+    )
+
+
+def _fetch_hist(standort, state, force=False):
+    """
+    Lädt days_hist.js eines Standorts. Mit bekanntem Stand (`state` aus dem
+    Manifest) wird bedingt angefragt; meldet der Server keine Änderung (304),
+    gibt es None. Sonst (DataFrame, ETag, Last-Modified).
+    """
+    headers = {}
+    if state is not None and not force:
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+    url = fetch.standort_url(standort, "days_hist.js")
+    response = fetch.get(url, headers=headers)
+    if response.status_code == 304:
+        return None
+    if response.status_code != 200:
+        raise fetch.DownloadError(f"{response.status_code} for URL {url}", response.status_code)
+    df = _archive_and_parse(response.text, standort=standort, kind="days_hist")
+    return df, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+
+def _date_range(df):
+    dates = pd.to_datetime(df["date"], errors="coerce").dropna()
+    if dates.empty:
+        return None, None
+    return dates.min().date(), dates.max().date()
+
+
+def update_ertrag(standorte=None, force_hist=False):
+    """
+    Holt die Ertragsdaten und schreibt sie in den Ertrags-Speicher.
+
+    days.js (die letzten Tage) wird immer geladen. days_hist.js ändert sich
+    nur selten; sie wird vollständig nur beim ersten Lauf, mit `force_hist`
+    oder bei einer Lücke zwischen übernommener Historie und days.js geladen.
+    Sonst wird mit dem gemerkten ETag/Last-Modified bedingt angefragt und
+    bei 304 übersprungen. Der übernommene Stand steht im Manifest.
+    """
+    ensure_store()
+    manifest = Manifest()
+    if standorte is None:
+        standorte =  ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]
     new_data_pull = []
+    hist_states = []
     for s in standorte:
-        url = f"https://www.oekumenische-energiegenossenschaft.de/datenlogger/{s}/visualisierung/days_hist.js"
-        response = requests.get(url)
-        new_data_pull.append(parse_js_text(response.text, standort=s))
-        url = f"https://www.oekumenische-energiegenossenschaft.de/datenlogger/{s}/visualisierung/days.js"
-        response = requests.get(url)
-        new_data_pull.append(parse_js_text(response.text, standort=s))
-    new_data_pull = pd.concat(new_data_pull) 
-
-    if os.path.exists("data/ertrag.parquet"):
-
-        old_data = pd.read_parquet("data/ertrag.parquet")
-  
-        final = pd.concat([new_data_pull,old_data]).drop_duplicates(subset=["date","standort","wr"],keep="first").sort_values(by="date")
-        
-        final.to_parquet("data/ertrag.parquet",index=False)
-    else:
-        new_data_pull.drop_duplicates(subset=["date","standort","wr"]).sort_values(by="date").to_parquet("data/ertrag.parquet",index=False)
+        try:
+            days = fetch.get_parsed(
+                fetch.standort_url(s, "days.js"), partial(_archive_and_parse, standort=s, kind="days")
+            )
+        except fetch.DownloadError as e:
+            print(f"[update_ertrag]: {s} - {e}")
+            days = None
+
+        state = manifest.source_state(s, "days_hist")
+        first_recent, _ = _date_range(days) if days is not None else (None, None)
+        has_gap = (
+            state is not None
+            and (state["last_date"] is None or first_recent is None
+                 or first_recent > state["last_date"] + pd.Timedelta(days=1))
+        )
+        if state is not None and not force_hist and not has_gap and not (state["etag"] or state["last_modified"]):
+            # Server liefert keine Validatoren: ohne Lücke nichts neu zu holen
+            hist = None
+        else:
+            try:
+                hist = _fetch_hist(s, state, force=force_hist or has_gap)
+            except fetch.DownloadError as e:
+                print(f"[update_ertrag]: {s} - {e}")
+                hist = None
+
+        # bei doppelten Tagen gewinnt wie bisher der Stand aus days_hist.js
+        if hist is not None:
+            hist_df, etag, last_modified = hist
+            new_data_pull.append(hist_df)
+            hist_states.append((s, etag, last_modified, *_date_range(hist_df)))
+        if days is not None:
+            new_data_pull.append(days)
+
+    if not new_data_pull:
+        print("[update_ertrag]: keine neuen Ertragsdaten")
+        return
+
+    upsert_ertrag(pd.concat(new_data_pull))
+    for s, etag, last_modified, first_date, last_date in hist_states:
+        manifest.record_source(s, "days_hist", etag, last_modified, first_date, last_date)
 
-    print("Ertragsdaten aktualisiert!")
\ No newline at end of file
+    print("Ertragsdaten aktualisiert!")
@@ -0,0 +1,132 @@
+import numpy as np
+import polars as pl
+
+# Obergrenze für die Zellen (Tage x Zeitpunkte x WR) eines dichten Blocks;
+# längere Zeiträume werden in Tagesblöcken gerechnet.
+MAX_CELLS = 2**24
+
+SCHEMA = {
+    "standort": pl.String,
+    "date": pl.Date,
+    "wr": pl.Int16,
+    "correlation": pl.Float32,
+    "zero_count": pl.Int32,
+    "total_count": pl.Int32,
+}
+
+
+def _index(site: pl.DataFrame):
+    """
+    Position jedes (nicht-null) Messwerts eines Standorts im dichten Array (Tage x
+    Zeitpunkte x WR): Zeitpunkte werden je Tag durchnummeriert. Die Messwerte
+    kommen nach Tag sortiert zurück, damit sich Tagesblöcke ausschneiden lassen.
+    """
+    times = site["Datetime"].unique().sort()
+    dates = times.dt.date().unique().sort()
+    wrs = site["wr"].unique().sort()
+
+    # erster Zeitpunkt je Tag in der sortierten Zeitachse; t zählt ab dort
+    first = np.searchsorted(times.to_numpy(), dates.cast(times.dtype).to_numpy())
+    t_all = np.searchsorted(times.to_numpy(), site["Datetime"].to_numpy())
+    d = np.searchsorted(first, t_all, side="right") - 1
+    t = t_all - first[d]
+    w = np.searchsorted(wrs.to_numpy(), site["wr"].to_numpy())
+    n_times = int(np.diff(first, append=len(times)).max())
+
+    order = np.argsort(d, kind="stable")
+    return dates, wrs, n_times, d[order], t[order], w[order], site["value"].to_numpy()[order]
+
+
+def _dense(n_days: int, n_times: int, n_wr: int, d, t, w, value):
+    """Dichtes Array eines Tagesblocks; `present` markiert die Zellen mit Messwert."""
+    values = np.full((n_days, n_times, n_wr), -np.inf)
+    present = np.zeros(values.shape, dtype=bool)
+    # doppelte Messwerte (gleicher Zeitpunkt und WR): Maximum
+    np.maximum.at(values, (d, t, w), value)
+    present[d, t, w] = True
+    values[~present] = 0
+    return values, present
+
+
+def _correlation(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """
+    Paarweise Korrelationen je Tag (Tage x WR x WR) über die Zeitpunkte, an
+    denen beide WR einen endlichen Messwert haben. Nicht definierte
+    Korrelationen (konstante Reihe, weniger als zwei Punkte) sind 0.
+    """
+    valid = present & np.isfinite(values)
+    mask = valid.astype(np.float64)
+    n = mask.sum(axis=1)
+    # um den Tagesmittelwert je WR verschieben, sonst löschen sich die Summen bei großen Leistungen aus
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, values, 0).sum(axis=1) / n
+    z = np.where(valid, values - mean[:, None, :], 0)
+
+    z_t = z.transpose(0, 2, 1)
+    pairs = mask.transpose(0, 2, 1) @ mask  # gemeinsame Zeitpunkte je Paar
+    sum_i = z_t @ mask  # [d, i, j]: Summe von z_i über die gemeinsamen Zeitpunkte
+    sum_ii = (z_t * z_t) @ mask
+    sum_ij = z_t @ z
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sum_ij - sum_i * sum_i.transpose(0, 2, 1) / pairs
+        var = sum_ii - sum_i * sum_i / pairs
+        corr = cov / np.sqrt(var * var.transpose(0, 2, 1))
+    defined = (pairs >= 2) & (var > 0) & (var.transpose(0, 2, 1) > 0)
+    return np.where(defined, np.clip(corr, -1, 1), 0)
+
+
+def day_statistics(power: pl.DataFrame) -> pl.DataFrame:
+    """
+    Fehler-Kennzahlen je (standort, date, wr) aus der WR-Leistung (Spalten
+    standort, date, Datetime, wr, value; siehe `leistung.wr_power`):
+
+    - `correlation`: höchste Korrelation des WR mit einem anderen WR am Tag
+      (None bei nur einem WR),
+    - `zero_count`: Zeitpunkte mit P = 0, während andere WR einspeisen,
+    - `total_count`: Zeitpunkte, an denen mindestens ein WR einspeist.
+
+    Alle Tage eines Standorts werden gemeinsam als dichtes Array gerechnet
+    (in Blöcken bis `MAX_CELLS`), die Korrelationen aller Paare in einem
+    Matrixprodukt je Tag.
+    """
+    frames = []
+    for (standort,), site in power.group_by("standort"):
+        # Standort ohne einen einzigen Messwert (z. B. nur nicht-numerische Tokens): nichts zu rechnen
+        site = site.filter(pl.col("value").is_not_null())
+        if site.is_empty():
+            continue
+        dates, wrs, n_times, d, t, w, value = _index(site)
+        n_wr = len(wrs)
+        step = max(1, MAX_CELLS // (n_times * n_wr))
+        for start in range(0, len(dates), step):
+            days = dates[start : start + step]
+            lo, hi = np.searchsorted(d, [start, start + len(days)])
+            v, p = _dense(len(days), n_times, n_wr, d[lo:hi] - start, t[lo:hi], w[lo:hi], value[lo:hi])
+
+            x = np.where(p, v, 0)
+            others = x.sum(axis=2, keepdims=True) - x
+            zero_count = (p & (v == 0) & (others != 0)).sum(axis=1)
+            total_count = (p & (v != 0)).any(axis=2).sum(axis=1)
+            if n_wr > 1:
+                corr = _correlation(v, p)
+                idx = np.arange(n_wr)
+                corr[:, idx, idx] = -np.inf
+                correlation = corr.max(axis=2)
+            else:
+                correlation = np.full((len(v), 1), np.nan)
+
+            frames.append(
+                pl.DataFrame(
+                    {
+                        "standort": standort,
+                        "date": np.repeat(days.to_numpy(), n_wr),
+                        "wr": np.tile(wrs.to_numpy(), len(days)),
+                        "correlation": correlation.ravel(),
+                        "zero_count": zero_count.ravel(),
+                        "total_count": np.repeat(total_count, n_wr),
+                    }
+                ).with_columns(pl.col("correlation").fill_nan(None))
+            )
+    if not frames:
+        return pl.DataFrame(schema=SCHEMA)
+    return pl.concat(frames).select(pl.col(c).cast(t) for c, t in SCHEMA.items())
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://www.oekumenische-energiegenossenschaft.de/datenlogger/"
+MAX_PER_HOST = 4  # gleichzeitige Requests pro Host
+MIN_INTERVAL = 0.25  # Mindestabstand (s) zwischen zwei Request-Starts pro Host
+TIMEOUT = 30
+CACHE_SIZE = 32  # Anzahl revalidierbarer Dateien (URL -> geparstes Ergebnis)
+
+
+class DownloadError(RuntimeError):
+    """Fehler beim Herunterladen der Quelldatei (HTTP o.ä.)."""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def standort_url(standort: str, file_name: str) -> str:
+    """URL einer Datei im Visualisierungs-Ordner des Datenloggers eines Standorts."""
+    return f"{BASE_URL}{standort}/visualisierung/{file_name}"
+
+
+class HostLimiter:
+    """
+    Begrenzt die Anzahl gleichzeitiger Requests an einen Host und hält einen
+    Mindestabstand zwischen zwei Request-Starts ein (höfliches Crawlen).
+    """
+
+    def __init__(self, max_concurrent: int = MAX_PER_HOST, min_interval: float = MIN_INTERVAL):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._start_lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._slots.acquire()
+        with self._start_lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+        return False
+
+
+_limiters: dict = {}
+_limiters_lock = threading.Lock()
+_session = None
+
+
+def configure(max_per_host: int = None, min_interval: float = None) -> None:
+    """Setzt die Limits für alle danach angefragten Hosts neu."""
+    global MAX_PER_HOST, MIN_INTERVAL, _session
+    with _limiters_lock:
+        if max_per_host is not None:
+            MAX_PER_HOST = max(1, int(max_per_host))
+        if min_interval is not None:
+            MIN_INTERVAL = max(0.0, float(min_interval))
+        _limiters.clear()
+        # Pool-Größe hängt an MAX_PER_HOST
+        _session = None
+
+
+def limiter_for(url: str) -> HostLimiter:
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = HostLimiter(MAX_PER_HOST, MIN_INTERVAL)
+        return limiter
+
+
+def session() -> requests.Session:
+    """Prozessweite Session mit Keep-Alive-Connection-Pool."""
+    global _session
+    with _limiters_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_PER_HOST)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def get(url: str, headers: dict = None) -> requests.Response:
+    """GET über die gepoolte Session, mit Host-Limit und Timeout."""
+    with limiter_for(url):
+        return session().get(url, headers=headers, timeout=TIMEOUT)
+
+
+# URL -> (ETag, Last-Modified, geparstes Ergebnis)
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_parsed(url: str, parse: Callable[[str], object]):
+    """
+    Lädt `url` und gibt `parse(text)` zurück. Das Ergebnis wird zusammen mit
+    ETag/Last-Modified gemerkt; beim nächsten Aufruf wird bedingt angefragt
+    (If-None-Match / If-Modified-Since) und bei 304 das gemerkte Ergebnis
+    ohne erneutes Parsen zurückgegeben.
+
+    Das Ergebnis wird geteilt und darf vom Aufrufer nicht verändert werden.
+    """
+    with _cache_lock:
+        entry = _cache.get(url)
+
+    headers = {}
+    if entry is not None:
+        etag, last_modified, _ = entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    response = get(url, headers=headers)
+    if response.status_code == 304 and entry is not None:
+        with _cache_lock:
+            if url in _cache:
+                _cache.move_to_end(url)
+        return entry[2]
+    if response.status_code != 200:
+        raise DownloadError(f"{response.status_code} for URL {url}", response.status_code)
+
+    value = parse(response.text)
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        with _cache_lock:
+            _cache[url] = (etag, last_modified, value)
+            _cache.move_to_end(url)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return value
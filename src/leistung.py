@@ -1,23 +1,76 @@
 import datetime as dt
+import multiprocessing
+import os
+import queue
 import threading
+import time
+import numpy as np
 import polars as pl
-from deltalake import DeltaTable
+import pyarrow as pa
+from deltalake import DeltaTable, write_deltalake
 import pandas as pd
-import requests
 import re
-from io import StringIO
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Tuple
+from typing import Callable, Iterator, List, Tuple
 from functools import lru_cache
 from tqdm import tqdm
 
+from src import archive, fetch, maintenance, rollup
+from src.manifest import STATUS_FAILED, STATUS_OK, STATUS_PENDING, Manifest, is_due
+from src.writer import DeltaWriter, WriterClosedError
+from src.fetch import DownloadError
+
 # Meta/paths kept outside the class, as requested
 PATH_DELTA = "data/delta-table/"
 lock = threading.Lock()
 
-
-class DownloadError(RuntimeError):
-    """Fehler beim Herunterladen der Quelldatei (HTTP o.ä.)."""
+BATCH_MAX_ROWS = 2_000_000  # Zeilen pro Delta-Commit beim Nachladen
+BATCH_MAX_BYTES = 256 * 1024**2  # Speicherbudget (pandas) pro Delta-Commit
+WRITER_PUT_TIMEOUT = 30  # Sekunden Backpressure, bevor ein Schreibauftrag direkt geschrieben wird
+INTRADAY_TTL = 300  # Sekunden, bis min_day.js erneut angefragt wird
+INTRADAY_HEAD = 16 * 1024  # Bytes vom Dateianfang (neueste Records), die ein Range-Request lädt
+# Physisches Schema der Messwert-Tabelle. sensor/standort bleiben Strings
+# (Delta kennt keine Dictionary-Typen); Parquet legt sie dictionary-kodiert ab.
+SCHEMA = {
+    "Datetime": pl.Datetime(time_unit="us"),  # Delta-Timestamps sind immer µs
+    "date": pl.Date,
+    "month": pl.String,  # "YYYY-MM"
+    "wr": pl.Int16,
+    "string": pl.Int8,
+    "sensor": pl.String,
+    "value": pl.Float32,  # W bzw. V, ~7 signifikante Stellen reichen
+    "standort": pl.String,
+}
+# Alternatives Layout: eine Zeile je (standort, Datetime, wr), Kanäle als
+# Spalten, String-Werte als Listen (Index 0 = String 1). Gewählt beim Anlegen
+# der Tabelle, erkannt wird es später am Schema (Spalte "P").
+LAYOUT_LONG = "long"
+LAYOUT_WIDE = "wide"
+WIDE_SCHEMA = {
+    "Datetime": pl.Datetime(time_unit="us"),
+    "date": pl.Date,
+    "month": pl.String,
+    "wr": pl.Int16,
+    "P": pl.Float32,
+    "sum": pl.Float32,
+    "T": pl.Float32,
+    "string_P": pl.List(pl.Float32),
+    "string_Udc": pl.List(pl.Float32),
+    "standort": pl.String,
+}
+# Partitionierung: ein Verzeichnis je Standort und Monat. Leseprädikate
+# filtern auf standort/month (Partition) und date (Statistik) statt auf
+# Datetime.dt.date(), das weder Partitionen noch Statistiken nutzen kann.
+PARTITIONS = ["standort", "month"]
+_writer = None
+_writer_lock = threading.Lock()
+_bootstrapped: set = set()  # Standorte, deren Manifest aus der Tabelle übernommen wurde
+# (standort, Tag) -> DataFrame, das beim Schreib-Dienst wartet (Manifest: 'pending')
+_inflight: dict = {}
+# standort -> Stand des inkrementellen Imports von min_day.js
+_intraday: dict = {}
+_intraday_locks: dict = {}
 
 
 class ParseError(RuntimeError):
@@ -28,8 +81,241 @@ class DataNotAvailableError(RuntimeError):
     """Keine Daten für das angeforderte Datum/Standort verfügbar."""
 
 
+def _to_float_array(tokens: List[str]) -> np.ndarray:
+    """Wandelt Text-Tokens in float64 um; nicht-numerische Tokens werden NaN."""
+    try:
+        return np.array([tok or "nan" for tok in tokens], dtype=np.float64)
+    except ValueError:
+        return pd.to_numeric(pd.Series(tokens, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def failure_reason(e: Exception) -> str:
+    """Ordnet einen Fehlschlag einer Retry-Klasse des Manifests zu (siehe `manifest.RETRY_POLICY`)."""
+    if isinstance(e, DownloadError):
+        return "missing" if e.status_code in (404, 410) else "http"
+    if isinstance(e, (ParseError, ValueError)):
+        return "parse"
+    return "network"
+
+
+def layout_schema(layout: str) -> dict:
+    return WIDE_SCHEMA if layout == LAYOUT_WIDE else SCHEMA
+
+
+def with_partition_columns(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Ergänzt die aus Datetime abgeleiteten Spalten date und month."""
+    return lf.with_columns(
+        pl.col("Datetime").dt.date().alias("date"),
+        pl.col("Datetime").dt.strftime("%Y-%m").alias("month"),
+    )
+
+
+def day_filter(standort: str, day: dt.date) -> pl.Expr:
+    """Filter auf einen Tag eines Standorts, der nur dessen Monats-Partition liest."""
+    return (
+        (pl.col("standort") == standort)
+        & (pl.col("month") == f"{day:%Y-%m}")
+        & (pl.col("date") == day)
+    )
+
+
+def to_wide(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """long -> wide: eine Zeile je (standort, Datetime, wr), siehe `WIDE_SCHEMA`."""
+    is_string = pl.col("string") != -1
+
+    def per_string(mask: pl.Expr) -> pl.Expr:
+        return pl.col("value").filter(mask).sort_by(pl.col("string").filter(mask))
+
+    return (
+        lf.group_by("standort", "Datetime", "date", "month", "wr")
+        .agg(
+            pl.col("value").filter((pl.col("sensor") == "P") & ~is_string).first().alias("P"),
+            pl.col("value").filter(pl.col("sensor") == "sum").first().alias("sum"),
+            pl.col("value").filter(pl.col("sensor") == "T").first().alias("T"),
+            per_string((pl.col("sensor") == "P") & is_string).alias("string_P"),
+            per_string(pl.col("sensor") == "Udc").alias("string_Udc"),
+        )
+        .select(pl.col(c).cast(t) for c, t in WIDE_SCHEMA.items())
+    )
+
+
+def to_long(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """wide -> long (Umkehrung von `to_wide`), Spalten wie `SCHEMA`."""
+    index = ["Datetime", "date", "month", "wr", "standort"]
+    parts = [
+        lf.unpivot(on=["P", "sum", "T"], index=index, variable_name="sensor", value_name="value")
+        .filter(pl.col("value").is_not_null())
+        .with_columns(pl.lit(-1).alias("string"))
+    ]
+    for sensor in ("P", "Udc"):
+        parts.append(
+            lf.select(*index, pl.col(f"string_{sensor}").alias("value"))
+            .with_columns(
+                pl.int_ranges(1, pl.col("value").list.len() + 1).alias("string"),
+                pl.lit(sensor).alias("sensor"),
+            )
+            .explode("value", "string")
+            .filter(pl.col("value").is_not_null())
+        )
+    return pl.concat(
+        [p.select(pl.col(c).cast(t) for c, t in SCHEMA.items()) for p in parts]
+    )
+
+
+def wr_power(lf: pl.LazyFrame, layout: str) -> pl.LazyFrame:
+    """Leistung je Wechselrichter (Datetime, date, wr, value, standort), unabhängig vom Layout."""
+    if layout == LAYOUT_WIDE:
+        return lf.select("Datetime", "date", "wr", pl.col("P").alias("value"), "standort")
+    return lf.filter((pl.col("string") == -1) & (pl.col("sensor") == "P"))
+
+
+def string_power(lf: pl.LazyFrame, layout: str) -> pl.LazyFrame:
+    """Leistung je String (Datetime, date, wr, string, value, standort), unabhängig vom Layout."""
+    if layout == LAYOUT_WIDE:
+        return (
+            lf.select("Datetime", "date", "wr", pl.col("string_P").alias("value"), "standort")
+            .with_columns(pl.int_ranges(1, pl.col("value").list.len() + 1).alias("string"))
+            .explode("value", "string")
+            .select("Datetime", "date", "wr", "string", "value", "standort")
+        )
+    return lf.filter((pl.col("string") != -1) & (pl.col("sensor") == "P"))
+
+
+def frames_to_arrow(frames: List[pd.DataFrame], layout: str = LAYOUT_LONG) -> pa.Table:
+    """Bringt Tages-DataFrames ins Schema der Delta-Tabelle (`SCHEMA` bzw. `WIDE_SCHEMA`) und liefert eine Arrow-Tabelle."""
+    pdf = pd.concat(frames, ignore_index=True)
+    pdf["Datetime"] = pd.to_datetime(pdf["Datetime"])
+    # feste Typen, damit Tabellen verschiedener Herkunft zusammenpassen
+    pldf = with_partition_columns(pl.DataFrame(pdf).lazy()).select(pl.col(c).cast(t) for c, t in SCHEMA.items()).collect()
+    if layout == LAYOUT_WIDE:
+        pldf = to_wide(pldf.lazy()).collect()
+    return pldf.to_arrow()
+
+
+def table_days(table: pa.Table) -> List[Tuple[str, dt.date]]:
+    """(standort, Tag)-Kombinationen einer Arrow-Tabelle im Schema der Delta-Tabelle."""
+    return list(pl.from_arrow(table.select(["standort", "date"])).unique().iter_rows())
+
+
+def table_schema() -> dict:
+    """Spalten-Typen der bestehenden Delta-Tabelle (vor `migrate_schema` noch int64/float64)."""
+    return dict(pl.scan_delta(PATH_DELTA).collect_schema())
+
+
+def table_layout() -> str:
+    return LAYOUT_WIDE if "P" in table_schema() else LAYOUT_LONG
+
+
+def available_cpus() -> int:
+    """Anzahl CPUs, die dem Prozess zur Verfügung stehen (Affinität und cgroup-Quota des Containers)."""
+    try:
+        n = len(os.sched_getaffinity(0))
+    except AttributeError:
+        n = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            n = min(n, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return n
+
+
+def _download_site(standort: str, days_back: int, max_per_host: int, min_interval: float, chunks) -> str:
+    """
+    Worker für `Leistung.download_sites`: lädt und parst einen Standort,
+    schreibt nichts. Die Tage gehen in Blöcken bis zum Batch-Budget
+    (`BATCH_MAX_ROWS`/`BATCH_MAX_BYTES`) als Arrow-Tabelle in die Queue
+    `chunks`; ist sie voll, wartet der Worker auf den Hauptprozess.
+    """
+    fetch.configure(max_per_host=max_per_host, min_interval=min_interval)
+    leistung = Leistung()
+    batch = WriteBatch(leistung, write=lambda frames: chunks.put((standort, frames_to_arrow(frames, leistung.layout))))
+    for df in leistung.fetch_days(standort, leistung.missing_dates(standort, days_back), progress=False):
+        batch.add(df)
+    batch.flush()
+    return standort
+
+
+def _reingest_year(standort: str, year: int, layout: str = LAYOUT_LONG) -> Tuple[str, pa.Table]:
+    """Worker für `Leistung.reingest`: parst alle archivierten Tage eines Standorts in einem Jahr."""
+    leistung = Leistung.__new__(Leistung)  # nur Parser, keine Tabelle nötig
+    frames = []
+    for day in archive.list_dates(standort, "min"):
+        if day.year != year:
+            continue
+        try:
+            frames.append(leistung._parse_day(archive.load(standort, "min", day), standort, day, f"archive:{day}"))
+        except Exception as e:
+            print(f"[reingest]: {standort} - {day} - {e}")
+    if not frames:
+        return standort, pa.table({})
+    return standort, frames_to_arrow(frames, layout)
+
+
+def days_predicate(standort: str, dates: List[dt.date]) -> str:
+    """
+    Delta-Prädikat für die Zeilen eines Standorts an den Tagen `dates`:
+    Partitionen (standort, month) explizit, zusammenhängende Tage als Bereich.
+    """
+    ranges = []
+    for day in sorted(set(dates)):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + dt.timedelta(days=1)
+        else:
+            ranges.append([day, day + dt.timedelta(days=1)])
+    months = ", ".join(f"'{m}'" for m in sorted({f"{d:%Y-%m}" for d in dates}))
+    clauses = " OR ".join(
+        f"(date >= '{start:%Y-%m-%d}' AND date < '{end:%Y-%m-%d}')"
+        for start, end in ranges
+    )
+    return f"standort = '{standort}' AND month IN ({months}) AND ({clauses})"
+
+
+class WriteBatch:
+    """
+    Sammelt Tages-DataFrames im Speicher und schreibt sie gebündelt über
+    `Leistung.write_frames` (oder `write`), sobald das Zeilen- oder
+    Byte-Budget erreicht ist. Ein Commit statt einem pro Tag hält Datei- und
+    Log-Anzahl klein.
+    """
+
+    def __init__(
+        self,
+        leistung: "Leistung",
+        max_rows: int = BATCH_MAX_ROWS,
+        max_bytes: int = BATCH_MAX_BYTES,
+        write: Callable[[List[pd.DataFrame]], None] = None,
+    ):
+        self.leistung = leistung
+        self.write = write or leistung.write_frames
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.frames: List[pd.DataFrame] = []
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, df: pd.DataFrame) -> None:
+        self.frames.append(df)
+        self.rows += len(df)
+        self.bytes += int(df.memory_usage(deep=True).sum())
+        if self.rows >= self.max_rows or self.bytes >= self.max_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.frames:
+            return
+        try:
+            self.write(self.frames)
+        except Exception as e:
+            print(f"[write_batch]: {len(self.frames)} Tage, {self.rows} Zeilen - {e}")
+        self.frames, self.rows, self.bytes = [], 0, 0
+
+
 class Leistung:
-    def __init__(self):
+    def __init__(self, layout: str = LAYOUT_LONG):
+        """`layout` (LAYOUT_LONG/LAYOUT_WIDE) gilt nur beim Anlegen; sonst zählt das Layout der Tabelle."""
         # Class no longer bound to a specific standort
         # create delta-table if not exists
         try:
@@ -37,18 +323,14 @@ class Leistung:
             DeltaTable(PATH_DELTA)
         except Exception:
             with lock:
-                empty_df = pd.DataFrame(
-                    {
-                        "Datetime": pd.Series(dtype="datetime64[s]"),
-                        "wr": pd.Series(dtype="int64"),
-                        "string": pd.Series(dtype="int64"),
-                        "sensor": pd.Series(dtype="str"),
-                        "value": pd.Series(dtype="float64"),
-                        "standort": pd.Series(dtype="str"),
-                    }
+                pl.DataFrame(schema=layout_schema(layout)).write_delta(
+                    PATH_DELTA, mode="overwrite", delta_write_options={"partition_by": PARTITIONS}
                 )
-                pl.DataFrame(empty_df).write_delta(PATH_DELTA, mode="overwrite")
-        pass
+        if "date" not in table_schema():
+            # Tabelle von vor der Partitionierung: einmalig umschreiben
+            self.migrate_schema()
+        self.layout = table_layout()
+        self.manifest = Manifest()
     
     def __make_column_metadata(self, n_cols: int, wr_label: str) -> List[Tuple[str, int]]:
         """
@@ -77,7 +359,7 @@ class Leistung:
         return meta
 
     @lru_cache(maxsize=32)   
-    def download_day_long(self, standort: str, date_str: str, ttl_hash=None) -> pd.DataFrame:
+    def download_day_long(self, standort: str, date_str: str) -> pd.DataFrame:
         """
         Lädt Loggerdaten (min<date>.js) und liefert ein "long" DataFrame mit diesen Spalten:
           - Datetime (pd.Timestamp)
@@ -85,199 +367,634 @@ class Leistung:
           - string (int) (-1 wenn kein String, sonst 1,2,...)
           - sensor (str) ('P','sum','Udc','T',...)
           - value (float)
-        """
-        
-        base_url = f"https://www.oekumenische-energiegenossenschaft.de/datenlogger/{standort}/visualisierung/"
-        heute = datetime.now().strftime("%y%m%d")
-        file_name = "min_day.js" if date_str == heute else f"min{date_str}.js"
-        url = base_url + file_name
 
-        response = requests.get(url)
+        Die heutige Datei (min_day.js) lädt `get_today`.
+        """
+        url = fetch.standort_url(standort, f"min{date_str}.js")
+        response = fetch.get(url)
         if response.status_code != 200:
-            raise DownloadError(f"{response.status_code} for URL {url}")
+            raise DownloadError(f"{response.status_code} for URL {url}", response.status_code)
+        # Rohdaten vor dem Parsen sichern, damit Parser-Fixes ohne erneuten Download greifen
+        day = datetime.strptime(date_str, "%y%m%d").date()
+        archive.store(standort, "min", day, response.content)
+        df = self._parse_day(response.text, standort, day, url)
+        df.attrs["etag"] = response.headers.get("ETag")
+        return df
+
+    def _parse_day(self, text: str, standort: str, day: dt.date, url: str = "") -> pd.DataFrame:
+        """
+        Parst eine abgeschlossene Tagesdatei und behält nur Zeilen dieses Tages.
+        Geschrieben wird je (standort, Tag) ersetzend; ein Record vom Folgetag
+        (z. B. 00:00 Uhr) würde sonst den Folgetag überschreiben.
+        """
+        df = self._parse_min_js(text, standort, url)
+        df = df[df["Datetime"].dt.date == day].reset_index(drop=True)
+        if df.empty:
+            raise ParseError(f"ParseError: keine Records vom {day} {url}")
+        return df
 
-        matches = re.findall(r'="([^"]+)"', response.text)
+    def _parse_min_js(self, text: str, standort: str, url: str = "") -> pd.DataFrame:
+        """
+        Parst den Inhalt einer min*.js-Datei in das "long" DataFrame (siehe `download_day_long`).
+
+        Ein Durchlauf über die Records liefert ein (Zeitpunkte x WR x Kanäle)
+        Float-Array; das long-Format entsteht daraus per Reshape, Metadaten
+        (wr, string, sensor) kommen als vorberechnete Index-Arrays je Spalte
+        dazu. Zeilenreihenfolge wie bisher: WR, dann Kanal, dann Zeitpunkt.
+        Volle Tagesdatei, 3 WR x 3 Strings: ~10x schneller als die alte
+        melt/apply-Variante (siehe benchmarks/parse_benchmark.py).
+        """
+        matches = re.findall(r'="([^"]+)"', text)
         if not matches:
             raise ParseError(f"ParseError: regex {url}")
 
-        raw_data = "\n".join(matches).replace("|", ",")
-        try:
-            raw_df = pd.read_csv(StringIO(raw_data), sep=",", header=None)
-        except Exception:
-            raise ParseError(f"ParseError: CSV {url}")
-        if raw_df.shape[1] < 2:
+        records = [m.split("|") for m in matches]
+        n_t = len(records)
+        n_wr = max(len(r) for r in records) - 1
+        if n_wr < 1:
             raise ParseError(f"ParseError: Shape {url}")
 
         try:
-            raw_df[0] = pd.to_datetime(raw_df[0], format="%d.%m.%y %H:%M:%S")
-            # Ensure second-level sampling (drop sub-second precision)
-            raw_df[0] = raw_df[0]
+            timestamps = pd.to_datetime([r[0] for r in records], format="%d.%m.%y %H:%M:%S")
         except Exception as e:
             raise ParseError(f"ParseError: Time {e} {url}")
 
-        raw_df.columns = ["Datetime"] + [f"WR{i + 1}" for i in range(len(raw_df.columns) - 1)]
-
-        long_parts: List[pd.DataFrame] = []
-        for wr_col in raw_df.columns[1:]:
-            col_series = raw_df[wr_col].astype(str)
-            split_df = col_series.str.split(";", expand=True)
-            split_df = split_df.apply(pd.to_numeric, errors="coerce")
-            split_df.index = raw_df.index
-
-            meta = self.__make_column_metadata(split_df.shape[1], wr_col)
-            if len(meta) != split_df.shape[1]:
+        # Zellen je (Zeitpunkt, WR) in Kanal-Tokens zerlegen; fehlende WR-Zellen sind leer
+        cells = [[c.split(";") for c in r[1:]] + [[""]] * (n_wr + 1 - len(r)) for r in records]
+        n_channels = [max(len(row[w]) for row in cells) for w in range(n_wr)]
+        c_max = max(n_channels)
+        tokens = [tok for row in cells for cell in row for tok in cell + [""] * (c_max - len(cell))]
+        values = _to_float_array(tokens).reshape(n_t, n_wr, c_max)
+
+        col_wr: List[int] = []
+        col_string: List[int] = []
+        col_sensor: List[str] = []
+        blocks = []
+        for w, n_cols in enumerate(n_channels):
+            wr_col = f"WR{w + 1}"
+            meta = self.__make_column_metadata(n_cols, wr_col)
+            if len(meta) != n_cols:
                 raise ParseError(
                     f"Meta-Länge stimmt nicht mit Spaltenanzahl überein für {wr_col} "
-                    f"({len(meta)} != {split_df.shape[1]})"
+                    f"({len(meta)} != {n_cols})"
                 )
+            col_wr += [w + 1] * n_cols
+            col_string += [stringnum for _, stringnum in meta]
+            col_sensor += [sensor for sensor, _ in meta]
+            blocks.append(values[:, w, :n_cols].T)
+
+        n_cols_total = len(col_wr)
+        result = pd.DataFrame(
+            {
+                "Datetime": np.tile(timestamps.values, n_cols_total),
+                "wr": np.repeat(np.asarray(col_wr, dtype=np.int64), n_t),
+                "string": np.repeat(np.asarray(col_string, dtype=np.int64), n_t),
+                "sensor": np.repeat(np.asarray(col_sensor, dtype=object), n_t),
+                "value": np.concatenate(blocks).ravel(),
+            }
+        )
+        # Doppelte Zeilen entstehen nur bei doppelten Zeitstempeln in der Datei
+        if timestamps.has_duplicates:
+            result = result.drop_duplicates().reset_index(drop=True)
+        result["standort"] = standort
+        return result
 
-            melted = split_df.reset_index().melt(id_vars="index", var_name="col_idx", value_name="value")
-
-            wr_idx_match = re.search(r"(\d+)", wr_col)
-            if not wr_idx_match:
-                raise ParseError(f"Konnte WR-Index nicht aus Spaltennamen '{wr_col}' extrahieren.")
-            wr_idx = int(wr_idx_match.group(1)) if wr_idx_match else None
-
-            def map_meta(col_idx: int) -> Tuple[int, str]:
-                col_idx = int(col_idx)
-                sensor, stringnum = meta[col_idx]
-                return stringnum, sensor
+    def write_frames(self, frames: List[pd.DataFrame]):
+        """Schreibt mehrere Tages-DataFrames in EINEM Delta-Commit (Upsert, siehe `write_tables`)."""
+        if not frames:
+            return
+        self.write_tables([frames_to_arrow(frames, self.layout)])
 
-            mapped = melted["col_idx"].apply(map_meta)
-            melted["string"] = mapped.apply(lambda x: x[0])
-            melted["sensor"] = mapped.apply(lambda x: x[1])
-            melted["wr"] = wr_idx
-            melted["Datetime"] = melted["index"].map(raw_df["Datetime"])
+    def write_tables(self, tables: List[pa.Table]):
+        """
+        Schreibt Arrow-Tabellen (siehe `frames_to_arrow`) idempotent in EINEM
+        Delta-Commit: Alle (standort, Tag)-Kombinationen, die in den Tabellen
+        vorkommen, werden atomar ersetzt (Overwrite mit Prädikat). Erneut
+        geladene Tage erzeugen so keine Duplikate. Nach dem Commit werden die
+        Tage mit ihrer Zeilenzahl im Manifest als 'ok' eingetragen und ihre
+        Rollups aktualisiert.
+        """
+        tables = [t for t in tables if t.num_rows > 0]
+        if not tables:
+            return
+        pldf = pl.from_arrow(pa.concat_tables(tables))
+        # Tabellen im alten Schema (vor `migrate_schema`) bleiben beschreibbar
+        pldf = pldf.cast(table_schema())
+        keys = pldf.select("standort", "date").unique()
+        predicate = " OR ".join(
+            f"({days_predicate(standort, group['date'].to_list())})"
+            for (standort,), group in keys.group_by("standort")
+        )
+        with lock:
+            pldf.write_delta(PATH_DELTA, mode="overwrite", delta_write_options={"predicate": predicate})
+        entries = list(pldf.group_by("standort", "date").len().iter_rows())
+        self.manifest.record_ok(entries)
+        try:
+            rollup.update(wr_power(pldf.lazy(), self.layout))
+        except Exception as e:
+            # die Tage bleiben ohne rollup_at im Manifest; `update_rollups` zieht sie nach
+            print(f"[rollup]: {e}")
+        else:
+            self.manifest.record_rollup((standort, date) for standort, date, _ in entries)
+
+    def writer(self) -> DeltaWriter:
+        """Prozessweiter Schreib-Dienst (ein Consumer-Thread, gebündelte Commits)."""
+        global _writer
+        with _writer_lock:
+            if _writer is None:
+                _writer = DeltaWriter(self._write_queued)
+            return _writer
+
+    def _write_queued(self, tables: List[pa.Table]) -> None:
+        """Schreibt für den Schreib-Dienst; die Tage gelten danach (auch bei Fehler) nicht mehr als unterwegs."""
+        try:
+            self.write_tables(tables)
+        finally:
+            for table in tables:
+                for key in table_days(table):
+                    _inflight.pop(key, None)
 
-            part = melted[["Datetime", "wr", "string", "sensor", "value"]].copy()
-            part["wr"] = part["wr"].astype(int)
-            part["string"] = part["string"].astype(int)
-            part["value"] = pd.to_numeric(part["value"], errors="coerce")
-            long_parts.append(part)
+    def submit_write(self, df: pd.DataFrame) -> None:
+        """
+        Reiht ein Tages-DataFrame beim Schreib-Dienst ein. Bis zum Commit liefert
+        `get_day_and_update` den Tag aus `_inflight`, statt ihn erneut zu laden.
+        Ist die Queue länger als `WRITER_PUT_TIMEOUT` voll oder der
+        Schreib-Dienst schon geschlossen (Prozess endet), wird direkt im
+        aufrufenden Thread geschrieben.
+        """
+        table = frames_to_arrow([df], self.layout)
+        keys = table_days(table)
+        for key in keys:
+            _inflight[key] = df
+        try:
+            self.writer().submit(table, timeout=WRITER_PUT_TIMEOUT)
+            return
+        except queue.Full:
+            print(f"[submit_write]: Queue voll, schreibe direkt: {df['standort'].iloc[0]}")
+        except WriterClosedError:
+            pass
+        self._write_queued([table])
 
-        if not long_parts:
-            raise ParseError("Keine Wechselrichter-Spalten verarbeitet (keine Teile erzeugt).")
+    def reingest(self, standorte: List[str] = None, processes: int = None) -> None:
+        """
+        Baut die Delta-Tabelle aus dem Rohdaten-Archiv (`src.archive`) neu auf,
+        ohne den Webserver anzufragen. Geparst wird parallel je (Standort, Jahr)
+        im Prozess-Pool; jedes Ergebnis ersetzt über `write_tables` atomar genau
+        die archivierten Tage. Nicht archivierte Tage (z. B. vor Einführung des Archivs geladen)
+        bleiben unverändert.
+        """
+        standorte = standorte or archive.list_standorte()
+        tasks = [(s, year) for s in standorte for year in sorted({d.year for d in archive.list_dates(s, "min")})]
+        if not tasks:
+            print("[reingest]: Archiv ist leer")
+            return
+        processes = max(1, min(processes or available_cpus(), len(tasks)))
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=ctx) as pool:
+            futures = [pool.submit(_reingest_year, s, year, self.layout) for s, year in tasks]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Reingest"):
+                try:
+                    standort, table = future.result()
+                    self.write_tables([table])
+                except Exception as e:
+                    print(f"[reingest]: {e}")
 
-        result = pd.concat(long_parts, ignore_index=True)
-        result = result.drop_duplicates().reset_index(drop=True)
-        result["standort"] = standort
-        return result
+    def optimize(self, dry_run: bool = False) -> dict:
+        """
+        Nächtliche Wartung (siehe `src.maintenance`): kompaktiert nur
+        (standort, month)-Partitionen mit vielen kleinen Dateien und räumt
+        mit sicherer Retention auf. Innerhalb einer Partition liegen die Daten
+        bereits nach Datetime geordnet, ein Z-Order ist nicht nötig.
+        """
+        with lock:
+            return maintenance.run(PATH_DELTA, dry_run=dry_run)
+
+    def rebuild_rollups(self, standorte: List[str] = None) -> None:
+        """Berechnet die Rollups und Tageskurven (`src.rollup`) aus der Tabelle neu, monatsweise je Standort."""
+        keys = pl.scan_delta(PATH_DELTA).select("standort", "month").unique()
+        if standorte:
+            keys = keys.filter(pl.col("standort").is_in(standorte))
+        for standort, month in tqdm(keys.collect().sort("standort", "month").iter_rows(), desc="Rollups"):
+            lf = pl.scan_delta(PATH_DELTA).filter((pl.col("standort") == standort) & (pl.col("month") == month))
+            rollup.update(wr_power(lf, self.layout))
+            days = lf.select("date").unique().collect()["date"]
+            self.manifest.record_rollup((standort, day) for day in days)
+
+    def update_rollups(self, standorte: List[str] = None) -> None:
+        """
+        Zieht die Rollups für alle Tage nach, die im Manifest 'ok' sind, aber
+        keine aktuellen Rollups haben: nach einem fehlgeschlagenen
+        `rollup.update` beim Schreiben und beim ersten Lauf für den Altbestand.
+        Gerechnet wird monatsweise je Standort, nur für die fehlenden Tage.
+        """
+        for standort in standorte or []:
+            self._bootstrap_manifest(standort)
+        missing = self.manifest.missing_rollups(standorte)
+        months = [
+            (standort, month, [d for d in dates if f"{d:%Y-%m}" == month])
+            for standort, dates in missing.items()
+            for month in sorted({f"{d:%Y-%m}" for d in dates})
+        ]
+        for standort, month, days in tqdm(months, desc="Rollups nachziehen", disable=not months):
+            lf = pl.scan_delta(PATH_DELTA).filter(
+                (pl.col("standort") == standort) & (pl.col("month") == month) & pl.col("date").is_in(days)
+            )
+            try:
+                rollup.update(wr_power(lf, self.layout))
+            except Exception as e:
+                print(f"[rollup]: {standort} - {month} - {e}")
+                continue
+            self.manifest.record_rollup((standort, day) for day in days)
 
-    def write_to_file(self, df: pd.DataFrame, date: dt.date):
+    def table_stats(self) -> dict:
+        """
+        Anzahl aktiver Dateien, deren Größe auf der Platte sowie Dauer und
+        Speicherbedarf eines typischen Scans (WR-Leistung aller Standorte,
+        danach Summe je Standort und Tag).
+        """
+        actions = pl.from_arrow(DeltaTable(PATH_DELTA).get_add_actions(flatten=True))
+        start = time.perf_counter()
+        rows = wr_power(pl.scan_delta(PATH_DELTA), table_layout()).collect()
+        rows.group_by("standort", pl.col("Datetime").dt.date()).agg(pl.col("value").sum())
+        return {
+            "files": len(actions),
+            "bytes": int(actions["size_bytes"].sum()) if len(actions) else 0,
+            "scan_s": time.perf_counter() - start,
+            "scan_bytes": rows.estimated_size(),
+        }
+
+    def migrate_schema(self) -> None:
+        """
+        Schreibt die Delta-Tabelle einmalig ins aktuelle Schema (`SCHEMA` bzw.
+        `WIDE_SCHEMA`) um: wr int16, string int8, value float32, dazu die
+        Spalten date/month und die Partitionierung nach `PARTITIONS`.
+        Gelesen und geschrieben wird batchweise, es liegt nie die ganze
+        Tabelle im Speicher. Die alten Dateien bleiben bis zum nächsten
+        Vacuum liegen.
+        """
         with lock:
-            pdf = df.copy()
-            pdf["Datetime"] = pd.to_datetime(pdf["Datetime"])
-            pldf = (
-                pl.DataFrame(pdf)
-                .with_columns(
-                    pl.col("Datetime").cast(pl.Datetime(time_unit="ms"))
-                )
+            current = table_schema()
+            schema = layout_schema(table_layout())
+            dtbl = DeltaTable(PATH_DELTA)
+            if (
+                all(current.get(c) == t for c, t in schema.items())
+                and dtbl.metadata().partition_columns == PARTITIONS
+            ):
+                print("[migrate_schema]: Tabelle hat bereits das aktuelle Schema")
+                return
+            before = self.table_stats()
+            target = pl.DataFrame(schema=schema).to_arrow().schema
+            batches = (
+                with_partition_columns(pl.from_arrow(b).lazy().drop("date", "month", strict=False))
+                .select(pl.col(c).cast(t) for c, t in schema.items())
+                .collect()
+                .to_arrow()
+                .cast(target)
+                .to_batches()[0]
+                for b in dtbl.to_pyarrow_dataset().to_batches()
+                if b.num_rows
+            )
+            reader = pa.RecordBatchReader.from_batches(target, batches)
+            if dtbl.metadata().partition_columns == PARTITIONS:
+                write_deltalake(dtbl, reader, partition_by=PARTITIONS, mode="overwrite", schema_mode="overwrite")
+            else:
+                # Partitionierung lässt sich per Overwrite nicht ändern: Tabelle neu
+                # anlegen und anhängen (die alten Dateien liest der Reader weiter);
+                # schlägt das fehl, wird die vorherige Version wiederhergestellt.
+                version = dtbl.version()
+                try:
+                    DeltaTable.create(PATH_DELTA, target, mode="overwrite", partition_by=PARTITIONS)
+                    write_deltalake(PATH_DELTA, reader, mode="append")
+                except Exception:
+                    DeltaTable(PATH_DELTA).restore(version)
+                    raise
+            after = self.table_stats()
+        for label, stats in (("vorher", before), ("nachher", after)):
+            print(
+                f"[migrate_schema]: {label}: {stats['files']} Dateien, "
+                f"{stats['bytes'] / 1024**2:.1f} MiB, Scan {stats['scan_s']:.2f} s "
+                f"({stats['scan_bytes'] / 1024**2:.1f} MiB im Speicher)"
             )
-            pldf.write_delta(PATH_DELTA, mode="append")
 
-    def optimize(self):
+    def convert_layout(self, layout: str) -> None:
+        """
+        Schreibt die Delta-Tabelle ins Layout `layout` um (long <-> wide), in
+        EINEM Commit. Umgerechnet wird standortweise, es liegt immer nur ein
+        Standort im Speicher.
+        """
         with lock:
+            if table_layout() == layout:
+                print(f"[convert_layout]: Tabelle ist bereits '{layout}'")
+                return
+            before = self.table_stats()
+            convert = to_wide if layout == LAYOUT_WIDE else to_long
+            standorte = pl.scan_delta(PATH_DELTA).select("standort").unique().collect()["standort"].to_list()
             dtbl = DeltaTable(PATH_DELTA)
-            before = len(dtbl.file_uris())
-            dtbl.optimize.z_order(["Datetime", "standort"])
-            dtbl.optimize.compact()
-            dtbl.vacuum(retention_hours=0, dry_run=False, enforce_retention_duration=False)
-            after = len(dtbl.file_uris())
-            print(f"[optimize]: Files before: {before}, after: {after}")
+            # der Generator läuft im Schreib-Runtime von deltalake: Datasets (je
+            # Standort-Partition) daher vorher anlegen, im Generator nur pyarrow lesen
+            datasets = [dtbl.to_pyarrow_dataset(partitions=[("standort", "=", s)]) for s in standorte]
+            target = pl.DataFrame(schema=layout_schema(layout)).to_arrow().schema
+            batches = (
+                batch
+                for dataset in datasets
+                for batch in convert(pl.from_arrow(dataset.to_table()).lazy())
+                .collect()
+                .to_arrow()
+                .cast(target)
+                .to_batches()
+            )
+            write_deltalake(
+                dtbl,
+                pa.RecordBatchReader.from_batches(target, batches),
+                partition_by=PARTITIONS,
+                mode="overwrite",
+                schema_mode="overwrite",
+            )
+            self.layout = layout
+            after = self.table_stats()
+        for label, stats in (("vorher", before), ("nachher", after)):
+            print(
+                f"[convert_layout]: {label}: {stats['files']} Dateien, "
+                f"{stats['bytes'] / 1024**2:.1f} MiB, Scan {stats['scan_s']:.2f} s "
+                f"({stats['scan_bytes'] / 1024**2:.1f} MiB im Speicher)"
+            )
+
+    def as_layout(self, df: pd.DataFrame) -> pl.LazyFrame:
+        """Frisch geparstes long-DataFrame im Layout der Tabelle (wie es `get_day_and_update` liefert)."""
+        lf = with_partition_columns(pl.LazyFrame(df))
+        if self.layout == LAYOUT_WIDE:
+            return to_wide(lf.select(pl.col(c).cast(t) for c, t in SCHEMA.items()))
+        return lf
+
+    def get_today(self, standort: str) -> pd.DataFrame:
+        """
+        Liefert die heutigen Daten (min_day.js) im "long"-Format und hält sie
+        inkrementell aktuell.
+
+        Nach Ablauf von `INTRADAY_TTL` wird bedingt angefragt (If-None-Match /
+        If-Modified-Since); bei 304 bleibt das geparste DataFrame. Die Datei
+        steht neueste Zeile zuerst, neue Records kommen also an den Anfang:
+        Ist der Stand bekannt, wird nur der Kopf (`INTRADAY_HEAD` Bytes)
+        angefragt und die Records nach dem letzten bekannten Zeitstempel
+        vorangestellt. Reicht der Kopf nicht bis zum bekannten Stand,
+        unterstützt der Server kein Range (200) oder ist ein neuer Tag
+        angebrochen, wird die ganze Datei geladen und neu geparst.
+        """
+        site_lock = _intraday_locks.setdefault(standort, threading.Lock())
+        with site_lock:
+            now = dt.datetime.now()
+            state = _intraday.get(standort)
+            if state is not None and state["date"] == now.date():
+                if (now - state["fetched_at"]).total_seconds() < INTRADAY_TTL:
+                    return state["df"]
+            else:
+                state = None
+
+            url = fetch.standort_url(standort, "min_day.js")
+            if state is None:
+                response = fetch.get(url)
+            else:
+                headers = {}
+                if state["etag"]:
+                    headers["If-None-Match"] = state["etag"]
+                if state["last_modified"]:
+                    headers["If-Modified-Since"] = state["last_modified"]
+                response = fetch.get(url, headers={**headers, "Range": f"bytes=0-{INTRADAY_HEAD - 1}"})
+                if response.status_code == 206 and self.__prepend_head(response, state, standort, url):
+                    state["fetched_at"] = now
+                    return state["df"]
+                if response.status_code not in (200, 304):
+                    # Kopf reicht nicht bis zum bekannten Stand -> ganze Datei
+                    response = fetch.get(url, headers=headers)
+                if response.status_code == 304:
+                    state["fetched_at"] = now
+                    return state["df"]
+
+            if response.status_code != 200:
+                raise DownloadError(f"{response.status_code} for URL {url}", response.status_code)
+            df = self._parse_min_js(response.text, standort, url)
+            _intraday[standort] = {
+                "date": now.date(),
+                "fetched_at": now,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "last_ts": df["Datetime"].max(),
+                "df": df,
+            }
+            return df
+
+    def __prepend_head(self, response, state: dict, standort: str, url: str) -> bool:
+        """
+        Übernimmt die Records aus dem Dateikopf, die neuer als der bekannte
+        Stand sind. False, wenn der Kopf nicht bis zum bekannten Stand reicht
+        (dann fehlen Records dazwischen) oder nicht lesbar ist.
+        """
+        head = response.content
+        cut = head.rfind(b"\n") + 1  # letzte Zeile kann abgeschnitten sein
+        if cut == 0:
+            return False
+        try:
+            df_head = self._parse_min_js(head[:cut].decode("utf-8", errors="replace"), standort, url)
+        except ParseError:
+            return False
+        if df_head["Datetime"].min() > state["last_ts"]:
+            return False
+        df_new = df_head[df_head["Datetime"] > state["last_ts"]]
+        if not df_new.empty:
+            state["df"] = pd.concat([df_new, state["df"]], ignore_index=True)
+            state["last_ts"] = df_new["Datetime"].max()
+        state["etag"] = response.headers.get("ETag")
+        state["last_modified"] = response.headers.get("Last-Modified")
+        return True
 
     def get_day_and_update(self, standort: str, date: dt.date) -> pl.LazyFrame:
+        """
+        Messwerte eines Tages im Layout der Tabelle (`self.layout`); für
+        WR-/String-Leistung siehe `wr_power`/`string_power`. `date` darf auch
+        ein (zeitzonenbehafteter) Timestamp sein, es zählt nur der Kalendertag.
+        """
+        # Manifest-Schlüssel und Filter auf die Spalte date brauchen den reinen Tag
+        date = pd.Timestamp(date).date()
         if date == dt.datetime.now().date():
             try:
-                ttl_hash = int(dt.datetime.now().timestamp() // 300)  # 5 minutes TTL
-                df = self.download_day_long(standort, date.strftime("%y%m%d"), ttl_hash=ttl_hash)
-                return pl.LazyFrame(df)
+                return self.as_layout(self.get_today(standort))
             except Exception as e:
                 raise DownloadError(f"Heutiger Download fehlgeschlagen: {standort} - {date} - {e}") from e
         else:
-            with lock:
-                lf = pl.scan_delta(PATH_DELTA)
-                lf = lf.filter((pl.col("Datetime").dt.date() == date) & (pl.col("standort") == standort))
-
-            n_rows_of_lf = lf.select(pl.len()).collect().item()
-            if n_rows_of_lf > 1:
+            queued = _inflight.get((standort, date))
+            if queued is not None:
+                # geladen, der Commit steht noch aus
+                return self.as_layout(queued)
+            self._bootstrap_manifest(standort)
+            entry = self.manifest.get(standort, date)
+            status = entry["status"] if entry else None
+            if status == STATUS_OK:
+                with lock:
+                    lf = pl.scan_delta(PATH_DELTA)
+                    lf = lf.filter(day_filter(standort, date))
                 return lf
-            if n_rows_of_lf == 1:
+            if status == STATUS_FAILED and not is_due(entry):
                 raise DataNotAvailableError(
-                    f"Platzhalter vorhanden, aber keine echten Daten: {standort} - {date}"
+                    f"Download fehlgeschlagen ({entry['error']}), keine Daten bis "
+                    f"{entry['retry_after']}: {standort} - {date}"
                 )
-            if n_rows_of_lf == 0:
+            # kein Eintrag, noch nicht committet oder Wartezeit abgelaufen -> laden
+            try:
+                df = self.download_day_long(standort, date.strftime("%y%m%d"))
+            except Exception as e:
+                self.manifest.record_failure(standort, date, e, failure_reason(e))
+                raise DownloadError(
+                    f"Download/Parse fehlgeschlagen: {standort} - {date} - {e}"
+                ) from e
+            self.manifest.record_fetched(standort, date, df.attrs.get("etag"))
+            self.submit_write(df)
+            return self.as_layout(df)
+
+    def _bootstrap_manifest(self, standort: str) -> None:
+        """
+        Übernimmt einmalig pro Standort den Bestand der Delta-Tabelle ins
+        Manifest (ein Scan, gruppiert nach Tag). Tage mit genau einer Zeile
+        sind Platzhalter aus der Zeit vor dem Manifest: Sie werden als
+        fehlgeschlagen eingetragen und aus der Tabelle gelöscht.
+        """
+        if standort in _bootstrapped:
+            return
+        if not self.manifest.is_bootstrapped(standort):
+            counts = (
+                pl.scan_delta(PATH_DELTA)
+                .filter(pl.col("standort") == standort)
+                .group_by("date")
+                .agg(pl.len().alias("count"))
+                .collect(engine="streaming")
+            )
+            placeholders = counts.filter(pl.col("count") == 1)["date"].to_list()
+            self.manifest.record_ok(
+                (standort, d, n) for d, n in counts.filter(pl.col("count") > 1).iter_rows()
+            )
+            for d in placeholders:
+                # Ursache unbekannt -> kurze Wartezeit, der nächste Lauf versucht es erneut
+                self.manifest.record_failure(standort, d, "Platzhalter (Altbestand)", "unknown")
+            if placeholders:
+                with lock:
+                    DeltaTable(PATH_DELTA).delete(f"standort = '{standort}' AND wr = -1")
+            self.manifest.mark_bootstrapped(standort)
+        _bootstrapped.add(standort)
+
+    def download_days(
+        self,
+        standort: str,
+        days_back: int,
+        max_workers: int = None,
+        batch_rows: int = BATCH_MAX_ROWS,
+        batch_bytes: int = BATCH_MAX_BYTES,
+    ) -> None:
+        """
+        Für einen Standort lädt für die letzten `days_back` Tage (ohne heute)
+        die fehlenden Leistungsdaten und schreibt sie in die Delta-Tabelle.
+        Gibt nichts zurück.
+
+        Die Downloads laufen parallel in einem Thread-Pool mit `max_workers`
+        Threads (Standard: `fetch.MAX_PER_HOST`); das Host-Limit und der
+        Mindestabstand in `src.fetch` bremsen die Anfragen an den Webserver.
+        Geparst wird in den Worker-Threads; die Tage werden im aufrufenden
+        Thread gesammelt und erst bei Erreichen von `batch_rows` Zeilen bzw.
+        `batch_bytes` Bytes (und am Ende) in einem Delta-Commit geschrieben.
+
+        Beispiel: days_back=7 lädt gestern bis einschließlich vor 7 Tagen.
+        """
+        missing_dates = self.missing_dates(standort, days_back)
+        batch = WriteBatch(self, max_rows=batch_rows, max_bytes=batch_bytes)
+        for df in self.fetch_days(standort, missing_dates, max_workers=max_workers):
+            batch.add(df)
+        batch.flush()
+
+    def download_sites(self, standorte: List[str], days_back: int, processes: int = None) -> None:
+        """
+        Wie `download_days`, aber für mehrere Standorte parallel in einem
+        Prozess-Pool (Standard: so viele Prozesse wie CPUs im Container,
+        höchstens `fetch.MAX_PER_HOST`). Die Worker laden und parsen und geben
+        Blöcke bis zum Batch-Budget über eine begrenzte Queue zurück;
+        geschrieben wird nur hier im Hauptprozess, ein Commit pro Block.
+        Host-Limit und Mindestabstand werden auf die Prozesse aufgeteilt,
+        damit der Webserver insgesamt nicht stärker belastet wird.
+        """
+        # jeder Prozess braucht mindestens eine Verbindung
+        processes = max(1, min(processes or available_cpus(), len(standorte), fetch.MAX_PER_HOST))
+        max_per_host = max(1, fetch.MAX_PER_HOST // processes)
+        min_interval = fetch.MIN_INTERVAL * processes
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Manager() as manager, ProcessPoolExecutor(max_workers=processes, mp_context=ctx) as pool:
+            chunks = manager.Queue(maxsize=processes)
+            pending = {
+                pool.submit(_download_site, s, days_back, max_per_host, min_interval, chunks): s for s in standorte
+            }
+            progress = tqdm(total=len(pending), desc="Downloading sites")
+            while pending or not chunks.empty():
+                try:
+                    standort, table = chunks.get(timeout=1)
+                except queue.Empty:
+                    for future in [f for f in pending if f.done()]:
+                        standort = pending.pop(future)
+                        progress.update()
+                        if future.exception() is not None:
+                            print(f"[download_sites]: {standort} - {future.exception()}")
+                    continue
                 try:
-                    df = self.download_day_long(standort, date.strftime("%y%m%d"))
-                    threading.Thread(target=self.write_to_file, args=(df, date), daemon=True).start()
-                    return pl.LazyFrame(df)
+                    self.write_tables([table])
                 except Exception as e:
-                    # Schreibe Platzhalter und werfe Error weiter
-                    df_empty = pd.DataFrame(
-                        [
-                            {
-                                "Datetime": date,
-                                "wr": -1,
-                                "string": -1,
-                                "sensor": -1,
-                                "value": -1,
-                                "standort": standort,
-                            }
-                        ]
-                    )
-                    df_empty["Datetime"] = pd.to_datetime(df_empty["Datetime"])
-                    threading.Thread(target=self.write_to_file, args=(df_empty, date), daemon=True).start()
-                    raise DownloadError(
-                        f"Download/Parse fehlgeschlagen: {standort} - {date} - {e}"
-                    ) from e
-
-    def download_days(self, standort: str, days_back: int) -> None:
-        """
-        Für einen Standort lädt für die letzten `days_back` Tage (inkl. heute)
-        die Leistungsdaten via `get_day_and_update` und führt danach `optimize()` aus.
-        Gibt nichts zurück.
+                    print(f"[download_sites]: {standort} - write - {e}")
+            progress.close()
 
-        Beispiel: days_back=7 lädt heute bis einschließlich vor 7 Tagen.
+    def missing_dates(self, standort: str, days_back: int) -> List[dt.date]:
+        """
+        Tage der letzten `days_back` Tage (ohne heute), die laut Manifest noch
+        nicht geschrieben sind. Fehlgeschlagene Tage zählen erst wieder, wenn
+        ihre Wartezeit (`retry_after`) abgelaufen ist.
         """
         if days_back < 0:
-            return
+            return []
+        self._bootstrap_manifest(standort)
         today = dt.datetime.now().date()
         start_date = today - dt.timedelta(days=days_back)
-        # Single-scan: build availability map to avoid per-day scans
-        counts_df = self._get_existing_counts(standort, start_date, today)
-        missing_dates = counts_df.loc[counts_df["count"]==0]["date"].tolist()
-
-        for single_date in tqdm(missing_dates, desc=f"Downloading days for {standort}"):
-            try:
-                self.get_day_and_update(standort, single_date)
-            except Exception as e:
-                print(f"[download_days]: {standort} - {single_date} - {e}")
-       
-
-    def _get_existing_counts(self, standort: str, start_date: dt.date, end_date: dt.date) -> dict:
+        entries = self.manifest.entries(standort, start_date, today)
+        now = dt.datetime.now()
+        missing = []
+        # heute ist noch unvollständig und wird nicht persistiert
+        for day in (start_date + dt.timedelta(days=i) for i in range(days_back)):
+            entry = entries.get(day)
+            if entry is None or entry["status"] == STATUS_PENDING or is_due(entry, now):
+                missing.append(day)
+        return missing
+
+    def fetch_days(
+        self, standort: str, dates: List[dt.date], max_workers: int = None, progress: bool = True
+    ) -> Iterator[pd.DataFrame]:
         """
-        Liefert eine Map {date: row_count} für einen Standort und Datumsbereich.
-        Führt nur EINE Delta-Scan-Operation durch und gruppiert nach Datum.
+        Lädt und parst die Tage `dates` parallel im Thread-Pool und liefert die
+        DataFrames in Fertigstellungs-Reihenfolge. Geladene Tage werden im
+        Manifest als 'pending', fehlgeschlagene als 'failed' eingetragen.
         """
-        try:
-            lf = pl.scan_delta(PATH_DELTA)
-            # Filter by standort and date range; use derived date for grouping
-            lf = lf.filter(pl.col("standort") == standort)
-            lf = lf.with_columns(pl.col("Datetime").dt.date().alias("date"))
-            lf = lf.filter((pl.col("date") >= pl.lit(start_date)) & (pl.col("date") <= pl.lit(end_date)))
-            counts_df = (
-                lf.group_by("date")
-                .agg(pl.len().alias("count"))
-                .collect(engine="streaming")
-                .to_pandas()
-            )
-            # sample the count_df to have a row for each date if no count fill with 0
-            all_dates = pd.date_range(start=start_date, end=end_date).date
-            counts_df = counts_df.set_index("date").reindex(all_dates, fill_value=0).reset_index()
-            counts_df.columns = ["date", "count"]
-            return counts_df
-        except Exception as e:
-            print(f"[existing_counts]: {standort} - {e}")
-            return {}
+        if not dates:
+            return
+        max_workers = max_workers or fetch.MAX_PER_HOST
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(self.download_day_long, standort, d.strftime("%y%m%d")): d
+                for d in dates
+            }
+            done = as_completed(futures)
+            if progress:
+                done = tqdm(done, total=len(futures), desc=f"Downloading days for {standort}")
+            for future in done:
+                single_date = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    print(f"[download_days]: {standort} - {single_date} - {e}")
+                    self.manifest.record_failure(standort, single_date, e, failure_reason(e))
+                    continue
+                self.manifest.record_fetched(standort, single_date, df.attrs.get("etag"))
+                yield df
 
     # def get_heutige_Leistung(self, standort: str) -> np.ndarray:
     #     """
@@ -0,0 +1,87 @@
+import time
+from typing import Dict, List
+
+import polars as pl
+from deltalake import DeltaTable
+
+SMALL_FILE_BYTES = 16 * 1024**2  # Dateien darunter gelten als klein
+COMPACT_MIN_FILES = 8  # ab so vielen kleinen Dateien je Partition wird kompaktiert
+COMPACT_MIN_BYTES = 64 * 1024**2  # ... oder ab dieser Summe kleiner Dateien
+TARGET_FILE_BYTES = 128 * 1024**2
+# Vacuum löscht nur Dateien, die seit mindestens so vielen Stunden nicht mehr
+# zur Tabelle gehören; laufende Leser alter Versionen bleiben so lesbar.
+VACUUM_RETENTION_HOURS = 168
+
+
+def plan(path: str) -> List[Dict]:
+    """
+    Plant die Wartung einer Delta-Tabelle anhand der Add-Actions, ohne Daten
+    zu lesen: Kompaktiert werden nur Partitionen mit mindestens
+    `COMPACT_MIN_FILES` kleinen Dateien oder `COMPACT_MIN_BYTES` in kleinen
+    Dateien. Rückgabe: eine Zeile je solcher Partition mit Anzahl und Größe.
+    """
+    dtbl = DeltaTable(path)
+    partitions = dtbl.metadata().partition_columns
+    actions = pl.from_arrow(dtbl.get_add_actions(flatten=True))
+    if actions.is_empty():
+        return []
+    keys = [f"partition.{p}" for p in partitions]
+    small = actions.filter(pl.col("size_bytes") < SMALL_FILE_BYTES)
+    if small.is_empty():
+        return []
+    stats = (
+        small.group_by(keys or pl.lit(True).alias("table"))
+        .agg(pl.len().alias("small_files"), pl.col("size_bytes").sum().alias("small_bytes"))
+        .filter((pl.col("small_files") >= COMPACT_MIN_FILES) | (pl.col("small_bytes") >= COMPACT_MIN_BYTES))
+        # eine Datei lässt sich nicht weiter zusammenfassen
+        .filter(pl.col("small_files") > 1)
+        .sort(keys or "small_files")
+    )
+    return [
+        {
+            "partition": {p: row[f"partition.{p}"] for p in partitions},
+            "small_files": row["small_files"],
+            "small_bytes": row["small_bytes"],
+        }
+        for row in stats.iter_rows(named=True)
+    ]
+
+
+def run(path: str, dry_run: bool = False) -> Dict:
+    """
+    Führt den Plan aus (`plan`): Compaction je betroffener Partition, danach
+    Vacuum mit `VACUUM_RETENTION_HOURS`. Gibt einen Bericht zurück und druckt ihn.
+    """
+    start = time.perf_counter()
+    tasks = plan(path)
+    dtbl = DeltaTable(path)
+    files_before = len(dtbl.file_uris())
+    removed = added = 0
+    for task in tasks:
+        label = ", ".join(f"{k}={v}" for k, v in task["partition"].items()) or "Tabelle"
+        print(f"[maintenance]: {label}: {task['small_files']} kleine Dateien, {task['small_bytes'] / 1024**2:.1f} MiB")
+        if dry_run:
+            continue
+        metrics = dtbl.optimize.compact(
+            partition_filters=[(k, "=", v) for k, v in task["partition"].items()] or None,
+            target_size=TARGET_FILE_BYTES,
+        )
+        removed += metrics.get("numFilesRemoved", 0)
+        added += metrics.get("numFilesAdded", 0)
+    vacuumed = dtbl.vacuum(retention_hours=VACUUM_RETENTION_HOURS, dry_run=dry_run)
+    report = {
+        "partitions": len(tasks),
+        "files_before": files_before,
+        "files_after": len(DeltaTable(path).file_uris()),
+        "files_compacted": removed,
+        "files_written": added,
+        "files_vacuumed": len(vacuumed),
+        "seconds": time.perf_counter() - start,
+    }
+    print(
+        f"[maintenance]: {path}: {report['partitions']} Partitionen kompaktiert "
+        f"({removed} -> {added} Dateien), {report['files_vacuumed']} Dateien gelöscht, "
+        f"Dateien {report['files_before']} -> {report['files_after']}, {report['seconds']:.1f} s"
+        + (" (dry run)" if dry_run else "")
+    )
+    return report
@@ -0,0 +1,264 @@
+import datetime as dt
+import os
+import sqlite3
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PATH_MANIFEST = "data/manifest/ingest.sqlite"
+
+STATUS_PENDING = "pending"  # geladen, aber noch nicht committet
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+# Grund des Fehlschlags -> (erste Wartezeit, maximale Wartezeit) bis zum nächsten Versuch.
+# Die Wartezeit verdoppelt sich mit jedem weiteren Fehlschlag bis zum Maximum.
+RETRY_POLICY = {
+    "missing": (dt.timedelta(hours=6), dt.timedelta(days=30)),  # 404/410: Datei gibt es (noch) nicht
+    "parse": (dt.timedelta(days=1), dt.timedelta(days=30)),
+    "http": (dt.timedelta(minutes=15), dt.timedelta(days=1)),  # 5xx u. ä.
+    "network": (dt.timedelta(minutes=15), dt.timedelta(days=1)),
+    "unknown": (dt.timedelta(minutes=15), dt.timedelta(days=1)),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest (
+    standort   TEXT NOT NULL,
+    date       TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    rows       INTEGER,
+    etag       TEXT,
+    fetched_at TEXT,
+    error      TEXT,
+    reason     TEXT,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    retry_after TEXT,
+    rollup_at  TEXT,
+    PRIMARY KEY (standort, date)
+);
+CREATE TABLE IF NOT EXISTS bootstrap (
+    standort   TEXT PRIMARY KEY,
+    done_at    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS source (
+    standort      TEXT NOT NULL,
+    kind          TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    first_date    TEXT,
+    last_date     TEXT,
+    fetched_at    TEXT NOT NULL,
+    PRIMARY KEY (standort, kind)
+);
+"""
+
+
+# Spalten, die nach der ersten Version hinzugekommen sind
+_MIGRATIONS = {
+    "reason": "ALTER TABLE ingest ADD COLUMN reason TEXT",
+    "attempts": "ALTER TABLE ingest ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+    "retry_after": "ALTER TABLE ingest ADD COLUMN retry_after TEXT",
+    "rollup_at": "ALTER TABLE ingest ADD COLUMN rollup_at TEXT",
+}
+
+
+def _now() -> str:
+    return dt.datetime.now().isoformat(timespec="seconds")
+
+
+def backoff(reason: str, attempts: int) -> dt.timedelta:
+    """Wartezeit nach dem `attempts`-ten Fehlschlag in Folge."""
+    first, cap = RETRY_POLICY.get(reason, RETRY_POLICY["unknown"])
+    # nach so vielen Verdopplungen ist das Maximum erreicht; größere Exponenten sprengen timedelta
+    doublings = min(max(attempts - 1, 0), (cap // first).bit_length())
+    return min(first * 2 ** doublings, cap)
+
+
+def is_due(entry: Optional[dict], now: dt.datetime = None) -> bool:
+    """True, wenn ein fehlgeschlagener Eintrag erneut versucht werden darf."""
+    if entry is None or entry["status"] != STATUS_FAILED:
+        return False
+    if not entry.get("retry_after"):
+        return True
+    return dt.datetime.fromisoformat(entry["retry_after"]) <= (now or dt.datetime.now())
+
+
+class Manifest:
+    """
+    Ingest-Manifest: eine Zeile pro (standort, Tag) mit Status, Zeilenzahl,
+    ETag der Quelldatei, Abrufzeit und Fehlertext. Lücken- und Aktualitäts-
+    prüfungen sind damit Lookups über Tage statt Scans der Messwert-Tabelle.
+    Fehlschläge sind ein ablaufender Negativ-Cache: Nach `retry_after` wird
+    der Tag erneut versucht.
+
+    `rollup_at` hält fest, wann die Rollups (`src.rollup`) eines Tages
+    zuletzt aus dem committeten Stand berechnet wurden; 'ok'-Tage ohne
+    `rollup_at` werden nachgezogen.
+
+    Zusätzlich hält die Tabelle `source` je (standort, Datei) den zuletzt
+    übernommenen Stand einer Sammeldatei wie days_hist.js (ETag,
+    Last-Modified, abgedeckter Zeitraum).
+
+    Gespeichert als SQLite-Datei; jede Operation öffnet eine eigene
+    Verbindung, damit Threads und Prozesse sie gefahrlos teilen können.
+    """
+
+    def __init__(self, path: str = PATH_MANIFEST):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+            columns = {row["name"] for row in con.execute("PRAGMA table_info(ingest)")}
+            for column, sql in _MIGRATIONS.items():
+                if column not in columns:
+                    con.execute(sql)
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=30)
+        con.row_factory = sqlite3.Row
+        return con
+
+    def _upsert(self, sql: str, rows: Iterable[tuple]) -> None:
+        with closing(self._connect()) as con, con:
+            con.executemany(sql, rows)
+
+    def record_fetched(self, standort: str, date: dt.date, etag: Optional[str] = None) -> None:
+        """Tag wurde geladen und geparst; Status bleibt 'pending', bis der Commit durch ist."""
+        self._upsert(
+            """
+            INSERT INTO ingest (standort, date, status, etag, fetched_at, error)
+            VALUES (?, ?, ?, ?, ?, NULL)
+            ON CONFLICT (standort, date) DO UPDATE SET
+                status = excluded.status, etag = excluded.etag,
+                fetched_at = excluded.fetched_at, error = NULL
+            """,
+            [(standort, date.isoformat(), STATUS_PENDING, etag, _now())],
+        )
+
+    def record_ok(self, entries: Iterable[Tuple[str, dt.date, int]]) -> None:
+        """Markiert (standort, Tag, Zeilenzahl) als committet; die Rollups des Tages gelten als veraltet."""
+        self._upsert(
+            """
+            INSERT INTO ingest (standort, date, status, rows, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (standort, date) DO UPDATE SET
+                status = excluded.status, rows = excluded.rows, error = NULL,
+                reason = NULL, attempts = 0, retry_after = NULL, rollup_at = NULL,
+                fetched_at = COALESCE(ingest.fetched_at, excluded.fetched_at)
+            """,
+            [(standort, date.isoformat(), STATUS_OK, int(rows), _now()) for standort, date, rows in entries],
+        )
+
+    def record_failure(self, standort: str, date: dt.date, error: str, reason: str = "unknown") -> dict:
+        """
+        Trägt einen Fehlschlag mit Grund ein. Folgen mehrere Fehlschläge
+        aufeinander, verdoppelt sich die Wartezeit bis zum nächsten Versuch
+        (siehe `RETRY_POLICY`). Gibt den neuen Eintrag zurück.
+        """
+        now = dt.datetime.now()
+        with closing(self._connect()) as con, con:
+            row = con.execute(
+                "SELECT status, attempts FROM ingest WHERE standort = ? AND date = ?",
+                (standort, date.isoformat()),
+            ).fetchone()
+            attempts = (row["attempts"] if row and row["status"] == STATUS_FAILED else 0) + 1
+            retry_after = (now + backoff(reason, attempts)).isoformat(timespec="seconds")
+            con.execute(
+                """
+                INSERT INTO ingest (standort, date, status, rows, fetched_at, error, reason, attempts, retry_after)
+                VALUES (?, ?, ?, 0, ?, ?, ?, ?, ?)
+                ON CONFLICT (standort, date) DO UPDATE SET
+                    status = excluded.status, rows = 0, fetched_at = excluded.fetched_at,
+                    error = excluded.error, reason = excluded.reason,
+                    attempts = excluded.attempts, retry_after = excluded.retry_after
+                """,
+                (standort, date.isoformat(), STATUS_FAILED, now.isoformat(timespec="seconds"),
+                 str(error), reason, attempts, retry_after),
+            )
+        return self.get(standort, date)
+
+    def get(self, standort: str, date: dt.date) -> Optional[dict]:
+        with closing(self._connect()) as con:
+            row = con.execute(
+                "SELECT * FROM ingest WHERE standort = ? AND date = ?", (standort, date.isoformat())
+            ).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, standort: str, start: dt.date, end: dt.date) -> Dict[dt.date, dict]:
+        """Alle Einträge eines Standorts zwischen `start` und `end` (inklusive) als {Tag: Eintrag}."""
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                "SELECT * FROM ingest WHERE standort = ? AND date BETWEEN ? AND ?",
+                (standort, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return {dt.date.fromisoformat(r["date"]): dict(r) for r in rows}
+
+    def latest_ok(self, standort: str) -> Optional[dt.date]:
+        """Jüngster vollständig geschriebener Tag eines Standorts."""
+        with closing(self._connect()) as con:
+            row = con.execute(
+                "SELECT MAX(date) FROM ingest WHERE standort = ? AND status = ?", (standort, STATUS_OK)
+            ).fetchone()
+        return dt.date.fromisoformat(row[0]) if row and row[0] else None
+
+    def record_rollup(self, entries: Iterable[Tuple[str, dt.date]]) -> None:
+        """Rollups für (standort, Tag) sind auf dem Stand des Commits."""
+        self._upsert(
+            "UPDATE ingest SET rollup_at = ? WHERE standort = ? AND date = ? AND status = ?",
+            [(_now(), standort, date.isoformat(), STATUS_OK) for standort, date in entries],
+        )
+
+    def missing_rollups(self, standorte: Optional[Iterable[str]] = None) -> Dict[str, List[dt.date]]:
+        """Committete Tage ohne (aktuelle) Rollups als {standort: [Tage]}."""
+        sql = "SELECT standort, date FROM ingest WHERE status = ? AND rollup_at IS NULL"
+        params: list = [STATUS_OK]
+        if standorte:
+            standorte = list(standorte)
+            sql += f" AND standort IN ({', '.join('?' for _ in standorte)})"
+            params += standorte
+        with closing(self._connect()) as con:
+            rows = con.execute(sql + " ORDER BY standort, date", params).fetchall()
+        missing: Dict[str, List[dt.date]] = {}
+        for row in rows:
+            missing.setdefault(row["standort"], []).append(dt.date.fromisoformat(row["date"]))
+        return missing
+
+    def is_bootstrapped(self, standort: str) -> bool:
+        with closing(self._connect()) as con:
+            return con.execute("SELECT 1 FROM bootstrap WHERE standort = ?", (standort,)).fetchone() is not None
+
+    def mark_bootstrapped(self, standort: str) -> None:
+        self._upsert("INSERT OR REPLACE INTO bootstrap (standort, done_at) VALUES (?, ?)", [(standort, _now())])
+
+    def source_state(self, standort: str, kind: str) -> Optional[dict]:
+        """Zuletzt übernommener Stand einer Sammeldatei (z. B. kind='days_hist') oder None."""
+        with closing(self._connect()) as con:
+            row = con.execute(
+                "SELECT * FROM source WHERE standort = ? AND kind = ?", (standort, kind)
+            ).fetchone()
+        if row is None:
+            return None
+        state = dict(row)
+        for key in ("first_date", "last_date"):
+            state[key] = dt.date.fromisoformat(state[key]) if state[key] else None
+        return state
+
+    def record_source(
+        self,
+        standort: str,
+        kind: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        first_date: Optional[dt.date],
+        last_date: Optional[dt.date],
+    ) -> None:
+        """Merkt sich, dass eine Sammeldatei mit diesem Stand vollständig übernommen wurde."""
+        self._upsert(
+            """
+            INSERT OR REPLACE INTO source (standort, kind, etag, last_modified, first_date, last_date, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [(standort, kind, etag, last_modified,
+              first_date.isoformat() if first_date else None,
+              last_date.isoformat() if last_date else None, _now())],
+        )
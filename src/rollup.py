@@ -0,0 +1,203 @@
+import datetime as dt
+import os
+import threading
+from typing import Iterable, List, Optional
+
+import polars as pl
+
+from src import fehler, maintenance
+
+# Verdichtete Tages- und Monatswerte je Wechselrichter, gepflegt beim Ingest
+PATH_DAILY = "data/rollup/daily/"
+PATH_MONTHLY = "data/rollup/monthly/"
+# Gesamtleistung je Standort und Tag als eine Zeile mit Listen (Tageskurve)
+PATH_TOTAL_POWER = "data/rollup/total_power/"
+# Fehler-Kennzahlen (Korrelation/Verfügbarkeit) je Standort, Tag und WR
+PATH_ERRORS = "data/rollup/errors/"
+# alle Rollup-Tabellen, z. B. für die Wartung (`src.maintenance`)
+PATHS = [PATH_DAILY, PATH_MONTHLY, PATH_TOTAL_POWER, PATH_ERRORS]
+# Lücken über diesem Abstand (z. B. Logger-Ausfall) werden nicht überbrückt
+MAX_GAP = dt.timedelta(minutes=15)
+
+DAILY_SCHEMA = {
+    "standort": pl.String,
+    "wr": pl.Int16,
+    "date": pl.Date,
+    "energy_wh": pl.Float64,  # Trapez-Integral von P über den Tag
+    "peak_w": pl.Float32,
+    "operating_minutes": pl.Float32,  # Minuten mit P > 0
+    "samples": pl.Int32,
+}
+MONTHLY_SCHEMA = {
+    "standort": pl.String,
+    "wr": pl.Int16,
+    "month": pl.String,  # "YYYY-MM"
+    "energy_wh": pl.Float64,
+    "peak_w": pl.Float32,
+    "operating_minutes": pl.Float32,
+    "days": pl.Int32,
+}
+TOTAL_POWER_SCHEMA = {
+    "standort": pl.String,
+    "date": pl.Date,
+    "Datetime": pl.List(pl.Datetime(time_unit="us")),
+    "P_gesamt": pl.List(pl.Float32),
+}
+ERRORS_SCHEMA = {
+    "standort": pl.String,
+    "date": pl.Date,
+    "wr": pl.Int16,
+    "correlation": pl.Float32,  # höchste Korrelation mit einem anderen WR desselben Tages
+    "zero_count": pl.Int32,  # Zeitpunkte mit P = 0, während andere WR einspeisen
+    "total_count": pl.Int32,  # Zeitpunkte, an denen mindestens ein WR einspeist
+}
+_lock = threading.Lock()
+
+
+def daily_from_power(power: pl.LazyFrame) -> pl.DataFrame:
+    """
+    Tageswerte aus der WR-Leistung (Spalten Datetime, date, wr, value,
+    standort; siehe `leistung.wr_power`): Energie als Trapez-Integral über
+    aufeinanderfolgende Messpunkte bis `MAX_GAP`, Spitzenleistung und
+    Betriebsminuten (Intervalle, in denen an beiden Enden P > 0 war).
+    """
+    by = ["standort", "wr", "date"]
+    step_h = pl.col("Datetime").diff().over(by).dt.total_seconds() / 3600
+    valid = step_h.is_not_null() & (step_h <= MAX_GAP.total_seconds() / 3600)
+    prev = pl.col("value").shift().over(by)
+    return (
+        power.select("standort", "wr", "date", "Datetime", pl.col("value").fill_nan(None))
+        .sort(*by, "Datetime")
+        .group_by(by)
+        .agg(
+            ((pl.col("value") + prev) / 2 * step_h).filter(valid).sum().alias("energy_wh"),
+            pl.col("value").max().alias("peak_w"),
+            (step_h * 60).filter(valid & (pl.col("value") > 0) & (prev > 0)).sum().alias("operating_minutes"),
+            pl.col("value").count().alias("samples"),
+        )
+        .select(pl.col(c).cast(t) for c, t in DAILY_SCHEMA.items())
+        .collect()
+    )
+
+
+def total_power_from_power(power: pl.LazyFrame) -> pl.DataFrame:
+    """Tageskurve der Standort-Leistung (Summe über alle WR je Zeitpunkt), eine Zeile je (standort, date)."""
+    return (
+        power.group_by("standort", "date", "Datetime")
+        .agg(pl.col("value").sum().alias("P_gesamt"))
+        .sort("standort", "date", "Datetime")
+        .group_by("standort", "date", maintain_order=True)
+        .agg("Datetime", "P_gesamt")
+        .select(pl.col(c).cast(t) for c, t in TOTAL_POWER_SCHEMA.items())
+        .collect()
+    )
+
+
+def load_total_power(standort: str, date: dt.date) -> Optional[pl.DataFrame]:
+    """Gespeicherte Tageskurve (Datetime, P_gesamt) oder None, wenn der Tag nicht materialisiert ist."""
+    if not exists(PATH_TOTAL_POWER):
+        return None
+    row = (
+        pl.scan_delta(PATH_TOTAL_POWER)
+        .filter((pl.col("standort") == standort) & (pl.col("date") == date))
+        .select("Datetime", "P_gesamt")
+        .collect()
+    )
+    if row.is_empty():
+        return None
+    return row.head(1).explode("Datetime", "P_gesamt")
+
+
+def errors_from_power(power: pl.LazyFrame) -> pl.DataFrame:
+    """Fehler-Kennzahlen je (standort, date, wr) aus der WR-Leistung, gerechnet mit `fehler.day_statistics`."""
+    days = fehler.day_statistics(power.select("standort", "date", "Datetime", "wr", "value").collect())
+    return days.select(pl.col(c).cast(t) for c, t in ERRORS_SCHEMA.items())
+
+
+def load_errors(standort: str, start: dt.date, end: dt.date, wr: Optional[Iterable[int]] = None) -> pl.DataFrame:
+    """Gespeicherte Fehler-Kennzahlen eines Standorts zwischen `start` und `end` (inklusive), optional nur für die WR `wr`."""
+    if not exists(PATH_ERRORS):
+        return pl.DataFrame(schema=ERRORS_SCHEMA)
+    predicate = (pl.col("standort") == standort) & pl.col("date").is_between(start, end)
+    if wr is not None:
+        predicate &= pl.col("wr").is_in(list(wr))
+    return pl.scan_delta(PATH_ERRORS).filter(predicate).sort("date", "wr").collect()
+
+
+def exists(path: str) -> bool:
+    return os.path.exists(os.path.join(path, "_delta_log"))
+
+
+def optimize(dry_run: bool = False) -> dict:
+    """
+    Wartung (`maintenance.run`) aller vorhandenen Rollup-Tabellen: Jeder
+    Ingest-Commit legt je Standort neue kleine Dateien an, die MERGEs auf
+    `PATH_MONTHLY` hinterlassen ersetzte Dateien. Rückgabe: {Pfad: Bericht}.
+    """
+    with _lock:
+        return {path: maintenance.run(path, dry_run=dry_run) for path in PATHS if exists(path)}
+
+
+def _upsert(path: str, df: pl.DataFrame, keys: List[str]) -> None:
+    """MERGE auf `keys`; die betroffenen Standort-Partitionen stehen explizit im Prädikat."""
+    if df.is_empty():
+        return
+    if not exists(path):
+        df.write_delta(path, mode="append", delta_write_options={"partition_by": ["standort"]})
+        return
+    standorte = ", ".join(f"'{s}'" for s in sorted(df["standort"].unique()))
+    match = " AND ".join(f"t.{k} = s.{k}" for k in keys)
+    (
+        df.write_delta(
+            path,
+            mode="merge",
+            delta_merge_options={
+                "predicate": f"t.standort IN ({standorte}) AND {match}",
+                "source_alias": "s",
+                "target_alias": "t",
+            },
+        )
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute()
+    )
+
+
+def _monthly(standort: str, months: Iterable[str]) -> pl.DataFrame:
+    """Monatswerte eines Standorts neu aus den Tageswerten der Monate `months`."""
+    months = sorted(set(months))
+    return (
+        pl.scan_delta(PATH_DAILY)
+        .filter((pl.col("standort") == standort) & pl.col("date").dt.strftime("%Y-%m").is_in(months))
+        .group_by("standort", "wr", pl.col("date").dt.strftime("%Y-%m").alias("month"))
+        .agg(
+            pl.col("energy_wh").sum(),
+            pl.col("peak_w").max(),
+            pl.col("operating_minutes").sum(),
+            pl.len().alias("days"),
+        )
+        .select(pl.col(c).cast(t) for c, t in MONTHLY_SCHEMA.items())
+        .collect()
+    )
+
+
+def update(power: pl.LazyFrame) -> pl.DataFrame:
+    """
+    Aktualisiert die Rollups für genau die Tage in `power` (alle Messwerte
+    dieser Tage, wie sie gerade geschrieben wurden): Tageswerte, Tageskurven
+    und Fehler-Kennzahlen per MERGE, danach die betroffenen Monate aus den
+    Tageswerten neu. Gibt die Tageswerte zurück.
+    """
+    daily = daily_from_power(power)
+    if daily.is_empty():
+        return daily
+    total_power = total_power_from_power(power)
+    errors = errors_from_power(power)
+    with _lock:
+        _upsert(PATH_DAILY, daily, ["standort", "wr", "date"])
+        _upsert(PATH_TOTAL_POWER, total_power, ["standort", "date"])
+        _upsert(PATH_ERRORS, errors, ["standort", "wr", "date"])
+        months = daily.select("standort", pl.col("date").dt.strftime("%Y-%m").alias("month")).unique()
+        for (standort,), group in months.group_by("standort"):
+            _upsert(PATH_MONTHLY, _monthly(standort, group["month"]), ["standort", "wr", "month"])
+    return daily
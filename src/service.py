@@ -0,0 +1,39 @@
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+
+from src.standort import Standort
+
+# Standorte im Dashboard ("waiblingen" -> kaco, "esslingen" -> fronius, "geislingen" -> unklar)
+STANDORTE = ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]
+
+# Gültigkeit (s) der zwischen allen Sessions geteilten Ergebnisse, je Aufrufstelle
+TTL_POWER = 5 * 60  # Tageskurven; der Logger liefert alle 5 min neue Werte
+TTL_ERRORS = 5 * 60  # kurz: Standort.error_statistics hält seinen Cache bis zum nächsten Commit selbst
+MAX_ENTRIES = 256  # je Funktion, ältere Einträge werden verdrängt
+
+
+@st.cache_resource
+def get_standort(standort: str) -> Standort:
+    """
+    Prozessweit geteiltes Standort-Objekt: Alle Sessions nutzen dieselbe
+    Instanz und damit dieselbe Leistung/Delta-Tabelle und dieselben Caches.
+    """
+    return Standort(standort)
+
+
+@st.cache_data(ttl=TTL_POWER, max_entries=MAX_ENTRIES, show_spinner=False)
+def total_power_of_day(standort: str, datum: date) -> pd.DataFrame:
+    return get_standort(standort).load_total_power_of_day(datum)
+
+
+@st.cache_data(ttl=TTL_POWER, max_entries=MAX_ENTRIES, show_spinner=False)
+def wr_power_of_day(standort: str, datum: date) -> pd.DataFrame:
+    return get_standort(standort).load_wr_power_of_day(datum)
+
+
+@st.cache_data(ttl=TTL_ERRORS, max_entries=MAX_ENTRIES, show_spinner=False)
+def error_statistics(standort: str, start: date, end: date, wr: Optional[int] = None) -> pd.DataFrame:
+    return get_standort(standort).error_statistics(start, end, wr)
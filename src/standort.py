@@ -4,15 +4,19 @@ from functools import lru_cache
 from datetime import date
 import polars as pl
 from calendar import monthrange
+from typing import Optional, Tuple, Union
 import numpy as np
-from itertools import combinations
-import re
-from src.leistung import Leistung
+from src import ertrag, rollup
+from src.cache import timed_cache
+from src.leistung import Leistung, string_power, wr_power
 
 PATH_META = "data/allgemein.csv"
-PATH_ERTRAG = "data/ertrag.parquet"
+PATH_ERTRAG = ertrag.PATH_ERTRAG  # Delta-Tabelle, partitioniert nach standort/year
 PATH_DELTA = "data/delta-table/"
 CACHE_SIZE = 32
+# Sicherheitsnetz; Ertrags- und Fehlerwerte verfallen ohnehin mit jedem Commit
+# auf ihre Tabelle und Werte mit Bezug auf "heute" um Mitternacht.
+CACHE_TTL = 60 * 60
 
 META = pd.read_csv(PATH_META)
 
@@ -24,6 +28,7 @@ class Standort:
         self.standort = standort
         self.meta = self.__get_meta_data()
         self.leistung = Leistung()
+        ertrag.ensure_store()
         return None
 
     
@@ -51,34 +56,44 @@ class Standort:
 
     ##############################################################################################################
     ## Leistungs-Daten:
-    def load_total_power_of_day(self, datum: date, ttl_hash=None) -> pd.DataFrame:
-        df_polars = self.leistung.get_day_and_update(self.standort, datum)
-        df = (
-            df_polars
-            .filter((pl.col("string") == -1) & (pl.col("sensor") == "P"))
-            .group_by("Datetime")
-            .agg(pl.col("value").sum().alias("P_gesamt"))
-            .sort("Datetime")
-            .collect(engine="streaming")
-            .to_pandas()
-        )
+    def latest_complete_day(self) -> Optional[date]:
+        """Jüngster vollständig geschriebener Tag laut Ingest-Manifest (None, wenn noch keiner)."""
+        return self.leistung.manifest.latest_ok(self.standort)
+
+    def load_total_power_of_day(self, datum: date) -> pd.DataFrame:
+        # abgeschlossene Tage: materialisierte Tageskurve, ein Lookup (siehe src/rollup.py)
+        series = None
+        if pd.Timestamp(datum).date() < date.today():
+            series = rollup.load_total_power(self.standort, pd.Timestamp(datum).date())
+        if series is not None:
+            df = series.to_pandas()
+        else:
+            df_polars = self.leistung.get_day_and_update(self.standort, datum)
+            df = (
+                wr_power(df_polars, self.leistung.layout)
+                .group_by("Datetime")
+                .agg(pl.col("value").sum().alias("P_gesamt"))
+                .sort("Datetime")
+                .collect(engine="streaming")
+                .to_pandas()
+            )
         sunrise, sunset = self.calculate_sunrise_times(datum)
         return df[(df["Datetime"] >= sunrise.replace(tzinfo=None)) & (df["Datetime"] <= sunset.replace(tzinfo=None))]
 
-    def load_wr_power_of_day(self, datum: date, ttl_hash=None) -> pd.DataFrame:
+    def load_wr_power_of_day(self, datum: date) -> pd.DataFrame:
         df_polars = self.leistung.get_day_and_update(self.standort, datum)
         return (
-            df_polars.filter((pl.col("string") == -1) & (pl.col("sensor") == "P"))
+            wr_power(df_polars, self.leistung.layout)
             # .pivot(on="wr",on_columns=df_polars.select("wr").unique().sort(by="wr").collect(),index="Datetime",values="value")
             .sort("Datetime")
             .collect(engine="streaming")
             .to_pandas()
         )
 
-    def load_string_power_of_day(self, datum: date, ttl_hash=None) -> pd.DataFrame:
+    def load_string_power_of_day(self, datum: date) -> pd.DataFrame:
         df_polars = self.leistung.get_day_and_update(self.standort, datum)
         return (
-            df_polars.filter((pl.col("string") != -1) & (pl.col("sensor") == "P"))
+            string_power(df_polars, self.leistung.layout)
             .sort("Datetime")
             .collect(engine="streaming")
             .to_pandas()
@@ -87,9 +102,9 @@ class Standort:
     ##############################################################################################################
     ## Ertrags-Daten:
 
-    @lru_cache
+    @timed_cache(ttl=CACHE_TTL, daily=True, tables=PATH_ERTRAG)
     def load_daily_yield_this_month(self):
-        data_polars = pl.scan_parquet(PATH_ERTRAG)
+        data_polars = pl.scan_delta(PATH_ERTRAG)
 
         heute = date.today()
         akt_jahr = heute.year
@@ -99,8 +114,8 @@ class Standort:
 
         df_monat = (
             data_polars.filter(
-                (pl.col("standort").str.to_lowercase() == self.standort)
-                & (pl.col("date").dt.year() == akt_jahr)
+                (pl.col("standort") == self.standort.lower())
+                & (pl.col("year") == akt_jahr)
                 & (pl.col("date").dt.month() == akt_monat)
             )
             .group_by(["standort", "date"])
@@ -120,9 +135,9 @@ class Standort:
         # Als Liste zurückgeben
         return np.round(numpy_array, 1)
 
-    @lru_cache
+    @timed_cache(ttl=CACHE_TTL, daily=True, tables=PATH_ERTRAG)
     def load_monthly_yield_this_year(self):
-        data_polars = pl.scan_parquet(PATH_ERTRAG)
+        data_polars = pl.scan_delta(PATH_ERTRAG)
 
         heute = date.today()
         akt_jahr = heute.year
@@ -130,8 +145,8 @@ class Standort:
         # Daten für das aktuelle Jahr filtern
         df_jahr = (
             data_polars.filter(
-                (pl.col("standort").str.to_lowercase() == self.standort.lower())
-                & (pl.col("date").dt.year() == akt_jahr)
+                (pl.col("standort") == self.standort.lower())
+                & (pl.col("year") == akt_jahr)
             )
             .with_columns(
                 [
@@ -155,14 +170,14 @@ class Standort:
         # Runde auf 1 Nachkommastelle und als numpy Array zurückgeben
         return np.round(ertrag_liste, 1)
 
-    @lru_cache
+    @timed_cache(ttl=CACHE_TTL, tables=PATH_ERTRAG)
     def load_total_yield(self):
-        data_polars = pl.scan_parquet(PATH_ERTRAG)
+        data_polars = pl.scan_delta(PATH_ERTRAG)
 
         # Filter nur nach Standort
         df = (
             data_polars.filter(
-                pl.col("standort").str.to_lowercase() == self.standort.lower()
+                pl.col("standort") == self.standort.lower()
             )
             .select(
                 (pl.col("value").sum() / 1000).alias("total_sum")  # Summe in kWh
@@ -173,15 +188,14 @@ class Standort:
         total = df["total_sum"][0] if len(df) > 0 else 0
         return int(round(total, 0))  # gerundet als Integer
 
-    @lru_cache
+    @timed_cache(ttl=CACHE_TTL, tables=PATH_ERTRAG)
     def load_yield_per_month(self):
-        data_polars = pl.scan_parquet(PATH_ERTRAG)
+        data_polars = pl.scan_delta(PATH_ERTRAG)
         df = (
             data_polars.filter(
-                pl.col("standort").str.to_lowercase() == self.standort.lower()
+                pl.col("standort") == self.standort.lower()
             )
             .with_columns(pl.col("date").dt.month().alias("month"))
-            .with_columns(pl.col("date").dt.year().alias("year"))
             .group_by(["year", "month"])
                 .agg(
                     (pl.col("value").sum() / 1000).alias("value_sum"),
@@ -195,14 +209,13 @@ class Standort:
         )
         return df.to_pandas()
 
-    @lru_cache
+    @timed_cache(ttl=CACHE_TTL, tables=PATH_ERTRAG)
     def load_yield_per_year(self):
-        data_polars = pl.scan_parquet(PATH_ERTRAG)
+        data_polars = pl.scan_delta(PATH_ERTRAG)
         df = (
             data_polars.filter(
-                pl.col("standort").str.to_lowercase() == self.standort.lower()
+                pl.col("standort") == self.standort.lower()
             )
-            .with_columns(pl.col("date").dt.year().alias("year"))
             .group_by("year")
             .agg((pl.col("value").sum() / 1000).alias("value_sum"))
             .sort("year")
@@ -211,15 +224,16 @@ class Standort:
         return df.to_pandas()
        
 
-    @lru_cache
+    @timed_cache(ttl=CACHE_TTL, daily=True, tables=PATH_ERTRAG)
     def load_daily_yield_last_year(self):
-        data_polars = pl.scan_parquet(PATH_ERTRAG)
+        data_polars = pl.scan_delta(PATH_ERTRAG)
 
         first_date = date.today() - pd.Timedelta(days=365)
     
         df_year = (
             data_polars.filter(
-                (pl.col("standort").str.to_lowercase() == self.standort)
+                (pl.col("standort") == self.standort.lower())
+                & (pl.col("year") >= first_date.year)
                 & (pl.col("date") >= first_date)
             )
             .group_by(["date"])
@@ -237,113 +251,84 @@ class Standort:
         return df_year
 
     ##############################################################################################################
-    ## Fehler-analyse:
-    @lru_cache
-    def calculate_error_statistics(self) -> pl.DataFrame:
-        dl = pl.scan_delta(PATH_DELTA)
-        filtered = dl.filter(
-            (pl.col("standort") == self.standort)
-            & (pl.col("string") == -1)
-            & (pl.col("sensor") == "P")
-        )
-
-        unique_wr = (
-            filtered.select(pl.col("wr")).unique().collect().to_series().to_list()
-        )
-
-        pivot_like = (
-            filtered.group_by(pl.col("Datetime"))
-            .agg(
-                [
-                    pl.col("value").filter(pl.col("wr") == v).max().alias(str(v))
-                    for v in unique_wr
-                ]
-            )
-            .sort("Datetime")
-            .with_columns(pl.col("Datetime").dt.date().alias("date"))
-        )
-
-        columns = [str(v) for v in unique_wr]
-
-        # Korrelationen zwischen allen Spalten
-        corr_exprs = [
-            pl.corr(pl.col(c1), pl.col(c2)).alias(f"corr_{c1}_{c2}")
-            for c1, c2 in combinations(columns, 2)
-        ]
-
-        # Zero-Count nur, wenn andere Spalten ungleich 0 sind
-        zero_count_exprs = []
-        for c in columns:
-            other_cols = [pl.col(col) for col in columns if col != c]
-            zero_count_exprs.append(
-                ((pl.col(c) == 0) & (pl.sum_horizontal(other_cols) != 0))
-                .sum()
-                .alias(f"{c}_zero_count")
-            )
+    ## Rollups (beim Ingest verdichtet, siehe src/rollup.py):
 
-        # total_count nur für Zeilen, bei denen mindestens ein Wert != 0
-        total_count_expr = (
-            (pl.any_horizontal([pl.col(c) != 0 for c in columns]))
-            .sum()
-            .alias("total_count")
+    @timed_cache(ttl=CACHE_TTL, tables=rollup.PATH_DAILY)
+    def load_daily_energy(self, start: date, end: date) -> pd.DataFrame:
+        """Tageswerte je WR zwischen `start` und `end` (inklusive): energy_wh, peak_w, operating_minutes, samples."""
+        if not rollup.exists(rollup.PATH_DAILY):
+            return pl.DataFrame(schema=rollup.DAILY_SCHEMA).to_pandas()
+        return (
+            pl.scan_delta(rollup.PATH_DAILY)
+            .filter((pl.col("standort") == self.standort) & pl.col("date").is_between(start, end))
+            .sort("date", "wr")
+            .collect()
+            .to_pandas()
         )
 
-        # Gruppieren nach Datum: Korrelationen + Zero-Counts + total_count
-        date_groups = pivot_like.group_by("date").agg(
-            corr_exprs + zero_count_exprs + [total_count_expr]
+    @timed_cache(ttl=CACHE_TTL, tables=rollup.PATH_MONTHLY)
+    def load_monthly_energy(self, year: int) -> pd.DataFrame:
+        """Monatswerte je WR eines Jahres: energy_wh, peak_w, operating_minutes, days."""
+        if not rollup.exists(rollup.PATH_MONTHLY):
+            return pl.DataFrame(schema=rollup.MONTHLY_SCHEMA).to_pandas()
+        return (
+            pl.scan_delta(rollup.PATH_MONTHLY)
+            .filter((pl.col("standort") == self.standort) & pl.col("month").str.starts_with(f"{year}-"))
+            .sort("month", "wr")
+            .collect()
+            .to_pandas()
         )
 
-        # Zero-Fraction berechnen
-        for c in columns:
-            date_groups = date_groups.with_columns(
-                (1 - pl.col(f"{c}_zero_count") / pl.col("total_count"))
-                .fill_nan(0)
-                .alias(f"{c}_availability")
-            )
-
-        # total_count skalieren (0 bis Maximum)
-        date_groups = date_groups.with_columns(
-            (pl.col("total_count") / pl.col("total_count").max())
-            .fill_nan(0)
-            .alias("total_availability")
+    ##############################################################################################################
+    ## Fehler-analyse:
+    def calculate_error_statistics(self) -> pd.DataFrame:
+        """Fehler-Kennzahlen aller WR für die letzten 365 Tage (siehe `error_statistics`)."""
+        end = date.today()
+        return self.error_statistics(end - pd.Timedelta(days=365), end)
+
+    @timed_cache(ttl=CACHE_TTL, tables=rollup.PATH_ERRORS)
+    def error_statistics(self, start: date, end: date, wr: Union[int, Tuple[int, ...], None] = None) -> pd.DataFrame:
+        """
+        Fehler-Kennzahlen je Tag zwischen `start` und `end` (inklusive):
+        `{wr}_correlation`, `{wr}_availability`, `total_availability` und
+        `mean_correlation` (Mittel über die gewählten WR). Zeitraum und WR
+        werden schon beim Lesen der beim Ingest berechneten Tageswerte
+        gefiltert (siehe src/rollup.py); fehlende Tage sind 0.
+        """
+        start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+        if isinstance(wr, int):
+            wr = [wr]
+        errors = rollup.load_errors(self.standort, start, end, wr)
+
+        wide = errors.pivot(
+            on="wr", index="date", values=["correlation", "zero_count", "total_count"], aggregate_function="first"
         )
-
-        # Alle Spaltennamen für spätere Verarbeitung
-        cols = date_groups.collect_schema().names()
-
-        # Matching-Spalten für Fehlerberechnung
-        new_exprs = []
-        for t in unique_wr:
-            # nur Korrelationen, die die Nummer t enthalten
-            matching = [
-                c for c in cols if c.startswith("corr_") and re.search(rf"_{t}(_|$)", c)
-            ]
-            if matching:
-                new_exprs.append((t, matching))
-        error_cols = [f"{t}_correlation" for t, _ in new_exprs]
-
-        # Finale Berechnungen: Fehler-Median und Mittelwert
+        columns = [str(v) for v in errors["wr"].unique().sort()]
         final = (
-            date_groups.with_columns(
-                [
-                    pl.max_horizontal([pl.col(c).fill_nan(0) for c in matching]).alias(
-                        f"{t}_correlation"
-                    )
-                    for t, matching in new_exprs
-                ]
+            wide.select(
+                "date",
+                # total_count ist je Tag für alle WR gleich
+                pl.coalesce(pl.col(f"total_count_{c}") for c in columns).alias("total_count")
+                if columns else pl.lit(0).alias("total_count"),
+                *[pl.col(f"correlation_{c}").fill_null(0).alias(f"{c}_correlation") for c in columns],
+                *[pl.col(f"zero_count_{c}").alias(f"{c}_zero_count") for c in columns],
             )
             .with_columns(
-                pl.mean_horizontal([pl.col(c) for c in error_cols]).alias(
-                    "mean_correlation"
-                )
+                (1 - pl.col(f"{c}_zero_count") / pl.col("total_count")).fill_nan(0).alias(f"{c}_availability")
+                for c in columns
             )
-            .collect().to_pandas()
+            .with_columns(
+                # total_count skalieren (0 bis Maximum)
+                (pl.col("total_count") / pl.col("total_count").max()).fill_nan(0).alias("total_availability"),
+                pl.mean_horizontal(pl.col(f"{c}_correlation") for c in columns).alias("mean_correlation")
+                if columns else pl.lit(0.0).alias("mean_correlation"),
+            )
+            .sort("date")
+            .to_pandas()
         )
-        # resample by 0 and fill missing  with 0 
-        end = date.today()
-        start = end - pd.Timedelta(days=365)
+        # resample by 0 and fill missing  with 0
         all_dates = pd.date_range(start=start, end=end, freq='D')
         final.set_index('date', inplace=True)
         final = final.reindex(all_dates, fill_value=0).rename_axis('date').reset_index()
-        
+
         return final
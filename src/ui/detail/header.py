@@ -1,5 +1,6 @@
 import streamlit as st
 from datetime import date
+from src.service import get_standort
 
 def create_header(allgemein,selected_standort):
     st.header(allgemein.loc[allgemein["id"]==selected_standort]["title"].values[0],width="content")
@@ -11,9 +12,9 @@ def create_header(allgemein,selected_standort):
         st.metric("in Betrieb seit", allgemein.loc[allgemein["id"]==selected_standort]["year"].values[0], border=False,height="stretch")        
         st.metric("Ausrichtung", allgemein.loc[allgemein["id"]==selected_standort]["orientation"].values[0], border=False, height="stretch") # ← ↖ ↑ ↗ → 
         
-        gesamt_ertrag = st.session_state[selected_standort].load_total_yield()
+        gesamt_ertrag = get_standort(selected_standort).load_total_yield()
         gesamt_ertrag_str = f"{round(gesamt_ertrag/1_000):,}".replace(",", ".")      
-        gestriger_ertrag = st.session_state[selected_standort].load_daily_yield_this_month()[ date.today().day-2]  
+        gestriger_ertrag = get_standort(selected_standort).load_daily_yield_this_month()[ date.today().day-2]  
         gestriger_ertrag = f"{gestriger_ertrag:,.1f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
         st.metric("Gesamtertrag", f"{gesamt_ertrag_str} MWh", f"+{gestriger_ertrag} kWh", border=False,height="stretch")
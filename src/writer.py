@@ -0,0 +1,90 @@
+import atexit
+import queue
+import threading
+from typing import Callable, List
+
+import pyarrow as pa
+
+QUEUE_SIZE = 64  # maximale Anzahl wartender Tabellen, danach blockiert submit()
+MAX_ROWS_PER_COMMIT = 2_000_000
+LINGER = 0.5  # Sekunden, die der Writer auf weitere Tabellen für denselben Commit wartet
+
+
+class WriterClosedError(RuntimeError):
+    """Der Writer wurde bereits geschlossen."""
+
+
+class DeltaWriter:
+    """
+    Schreib-Dienst mit genau einem Consumer-Thread.
+
+    `submit` legt Arrow-Tabellen in eine begrenzte Queue; ist sie voll,
+    blockiert der Aufrufer (Backpressure). Der Consumer nimmt alle wartenden
+    Tabellen (bis `max_rows`) zusammen und übergibt sie in einem Aufruf an
+    `write`, d. h. als einen Commit. `flush` wartet, bis alles geschrieben
+    ist; `close` wird zusätzlich beim Beenden des Prozesses aufgerufen.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[pa.Table]], None],
+        maxsize: int = QUEUE_SIZE,
+        max_rows: int = MAX_ROWS_PER_COMMIT,
+        linger: float = LINGER,
+    ):
+        self._write = write
+        self._queue: "queue.Queue[pa.Table]" = queue.Queue(maxsize=maxsize)
+        self._max_rows = max_rows
+        self._linger = linger
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="delta-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, table: pa.Table, timeout: float = None) -> None:
+        """Reiht `table` zum Schreiben ein; blockiert bei voller Queue (höchstens `timeout` s, dann queue.Full)."""
+        if self._closed:
+            raise WriterClosedError("DeltaWriter ist geschlossen")
+        self._queue.put(table, timeout=timeout)
+
+    def flush(self) -> None:
+        """Wartet, bis alle eingereihten Tabellen geschrieben sind."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.join()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            batch = [first]
+            rows = first.num_rows
+            stop = False
+            while rows < self._max_rows:
+                try:
+                    item = self._queue.get(timeout=self._linger)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+                rows += item.num_rows
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"[writer]: {len(batch)} Tabellen, {rows} Zeilen - {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
@@ -5,25 +5,30 @@ from src.ui.year import plot_calendar_heatmap
 from src.ui.day import plot_day
 from src.ui.ertrag import plot_yield
 from src.ui.detail.header import create_header
+from src.service import STANDORTE, error_statistics, get_standort, total_power_of_day, wr_power_of_day
 
 print("RERUN WHOLE SCRIPT")
 
-standorte = ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]#"waiblingen" läuft auf kaco esslingen in fronius,geislingen unklar
+standorte = STANDORTE
 Yellows = [[0.0, 'rgb(255, 250, 220)'],[1.0, 'rgb(255, 180, 0)']]
 allgemein = pd.read_csv("data/allgemein.csv")
 
 with st.sidebar:
     def format(s):
         try: 
-            res = st.session_state[s].load_total_power_of_day(date.today())
+            res = total_power_of_day(s, date.today())
             res = res.loc[res.Datetime.dt.date == date.today()]
             # loc by todays date
             if res is None or res.empty:
-                return f":red-badge[:material/error:] {st.session_state[s].meta['title']}"
+                return f":red-badge[:material/error:] {get_standort(s).meta['title']}"
+            # heute kommt an, aber der Import der Vortage hängt hinterher
+            latest = get_standort(s).latest_complete_day()
+            if latest is None or latest < date.today() - pd.Timedelta(days=1):
+                return f":orange-badge[:material/warning:] {get_standort(s).meta['title']}"
             else:
-                return f":green-badge[:material/check:] {st.session_state[s].meta['title']}"
+                return f":green-badge[:material/check:] {get_standort(s).meta['title']}"
         except Exception:
-            return f":red-badge[:material/error:] {st.session_state[s].meta['title']}"
+            return f":red-badge[:material/error:] {get_standort(s).meta['title']}"
         # return f":greenray-badge[:material/check: {allgemein.loc[allgemein['id']==s]['title'].values[0]}]"
         # return f":orange-badge[:material/warning: {allgemein.loc[allgemein['id']==s]['title'].values[0]}]"
         # return allgemein.loc[allgemein["id"]==s]["title"].values[0]#+":orange-badge[:material/warning: Auffälligkeiten!]" # :green-badge[:material/check: Alles in Ordnung!] :red-badge[:material/error: Fehlende Daten!]"
@@ -120,9 +125,9 @@ day_plot_ph = st.container(height=450,border=False)
 try:
     dt = pd.Timestamp(pd.to_datetime(st.session_state.selected_date ).date(), tz="Europe/Berlin")
     fig = plot_day(
-        st.session_state[selected_standort].load_total_power_of_day(dt),
-        st.session_state[selected_standort].load_wr_power_of_day(dt),
-        *st.session_state[selected_standort].calculate_sunrise_times(dt),
+        total_power_of_day(selected_standort, dt),
+        wr_power_of_day(selected_standort, dt),
+        *get_standort(selected_standort).calculate_sunrise_times(dt),
         allgemein.loc[allgemein["id"]==selected_standort]["peak"].values[0]/1_000,
         st.session_state.selected_unit
     )
@@ -162,21 +167,17 @@ with st.container(horizontal=True):
       
     )
     st.space("stretch")
-    option_map = {
-        0: ":material/Bolt: Gesamt",
-        1: "WR1",
-        2: "WR2",
-        3: "WR3",
-    
-    }
-    selection = st.segmented_control(
+    option_map = {0: ":material/Bolt: Gesamt"}
+    for wr in range(1, int(get_standort(selected_standort).meta["transformer_count"]) + 1):
+        option_map[wr] = f"WR{wr}"
+    selected_wr = st.segmented_control(
         "Tool",
         options=option_map.keys(),
         format_func=lambda option: option_map[option],
         selection_mode="single",
         default=0,
         label_visibility="hidden",
-          disabled=True
+          disabled=ertrag_oder_fehler != 1
 )
 
 if ertrag_oder_fehler == 0:
@@ -192,7 +193,7 @@ if ertrag_oder_fehler == 0:
     #                                   highlight_date=pd.to_datetime(st.session_state.selected_date ).date())
     Yellows = [[0.0, 'rgb(255, 250, 220)'],[1.0, 'rgb(255, 180, 0)']]
 
-    fig_heatmap = plot_calendar_heatmap(st.session_state[selected_standort].load_daily_yield_last_year(), 
+    fig_heatmap = plot_calendar_heatmap(get_standort(selected_standort).load_daily_yield_last_year(), 
                                         date_col='date', 
                                         value_col='value_sum', 
                                         formatting_colorscale=Yellows, 
@@ -204,7 +205,10 @@ if ertrag_oder_fehler == 0:
     
 else:
     Reds = [[0.0,'rgb(226, 55, 33)' ],[0.8,'rgb(233, 116, 99)'],[1.0, 'rgb(254, 245, 244)']]
-    fig_heatmap = plot_calendar_heatmap(st.session_state[selected_standort].calculate_error_statistics(), 
+    fig_heatmap = plot_calendar_heatmap(error_statistics(selected_standort,
+                                            date.today() - pd.Timedelta(days=365),
+                                            date.today(),
+                                            wr=selected_wr or None),
                                         date_col='date', 
                                         value_col='mean_correlation', 
                                         formatting_colorscale=Reds, 
@@ -219,7 +223,7 @@ heatmap_container = st.container(border=False,height=210,horizontal_alignment="c
 
 
 with heatmap_container:
-    # fig_heatmap = plot_calendar_heatmap(st.session_state[selected_standort].load_daily_yield_last_year(), 
+    # fig_heatmap = plot_calendar_heatmap(get_standort(selected_standort).load_daily_yield_last_year(), 
     #                             date_col='date', 
     #                             value_col='value_sum', 
     #                             formatting_colorscale=Yellows, 
@@ -250,8 +254,8 @@ with heatmap_container:
 
 @st.fragment
 def render_yield_plot():
-    monthly_df = st.session_state[selected_standort].load_yield_per_month()
-    yearly_df = st.session_state[selected_standort].load_yield_per_year()
+    monthly_df = get_standort(selected_standort).load_yield_per_month()
+    yearly_df = get_standort(selected_standort).load_yield_per_year()
 
     if not yearly_df.empty:
         available_years = [int(y) for y in yearly_df["year"].tolist()]
@@ -259,7 +263,7 @@ def render_yield_plot():
             st.session_state.selected_yield_year = max(available_years)
 
     fig_yield = plot_yield(
-        standort=st.session_state[selected_standort],
+        standort=get_standort(selected_standort),
         monthly_df=monthly_df,
         yearly_df=yearly_df,
         current_year=st.session_state.selected_yield_year,
@@ -1,5 +1,5 @@
 import streamlit as st
-from src.standort import Standort
+from src.service import STANDORTE, get_standort
 
 
 pg = st.navigation([st.Page("streamlit_overview.py", title="Übersicht"),st.Page("streamlit_detail.py", title="Detailansicht")])
@@ -12,9 +12,9 @@ st.logo(
    # size="large",
 )
 
-for s in ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]: #,"waiblingen" -> kaco ,"esslingen" -> fronius, "geislingen"->unklar,
-    if s not in st.session_state:
-        st.session_state[s] = Standort(s)
+# Standort-Objekte sind prozessweit geteilt (src/service.py), nicht je Session
+for s in STANDORTE:
+    get_standort(s)
 
 
 pg.run()
@@ -3,6 +3,7 @@ import streamlit as st
 from datetime import date,datetime
 import numpy as np
 from src.ui.anlagenfoto import st_Anlagenfoto
+from src.service import STANDORTE, get_standort, total_power_of_day
 #from backend_leistung import get_heutige_Leistung
 
 
@@ -11,34 +12,34 @@ from src.ui.anlagenfoto import st_Anlagenfoto
 
 st.title("Unsere Solaranlagen")
  
-for s in ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "tuebingen", "hospitalhof"]:
+for s in STANDORTE:
 
    
 
     col1, col2, col3 = st.columns([1,1,1])
     with col1:
-            st_Anlagenfoto(s,st.session_state[s].meta.get("title"))
+            st_Anlagenfoto(s,get_standort(s).meta.get("title"))
         
     with col2:        
         a, b = st.columns(2,border = False)
         c, d = st.columns(2,border = False)
 
-        a.metric("Peak Leistung", f"{round(st.session_state[s].meta.get('peak')/1_000)} kWp", border=False,height=95)
+        a.metric("Peak Leistung", f"{round(get_standort(s).meta.get('peak')/1_000)} kWp", border=False,height=95)
 
-        b.metric("in Betrieb seit", st.session_state[s].meta.get("year"), border=False,height=95)        
+        b.metric("in Betrieb seit", get_standort(s).meta.get("year"), border=False,height=95)        
         
-        c.metric("Ausrichtung", st.session_state[s].meta.get("orientation"), border=False, height="stretch") # ← ↖ ↑ ↗ → 
+        c.metric("Ausrichtung", get_standort(s).meta.get("orientation"), border=False, height="stretch") # ← ↖ ↑ ↗ → 
         
         
-        gestriger_ertrag = st.session_state[s].load_daily_yield_this_month()[date.today().day-2]
+        gestriger_ertrag = get_standort(s).load_daily_yield_this_month()[date.today().day-2]
         gestriger_ertrag = f"{gestriger_ertrag:,.1f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-        d.metric("Gesamtertrag", f"{round(st.session_state[s].load_total_yield()/1_000)} MWh", f"+{gestriger_ertrag} kWh", border=False,height=103)
+        d.metric("Gesamtertrag", f"{round(get_standort(s).load_total_yield()/1_000)} MWh", f"+{gestriger_ertrag} kWh", border=False,height=103)
         
         panel_col, transformer_col = st.columns([1,1])
         
-        panel_col.metric("Solarmodule",f"🔆 {st.session_state[s].meta.get('module_count')}",st.session_state[s].meta.get("module_brand"),delta_color="off")
-        transformer_col.metric("Wechselrichter",f"⚡ {st.session_state[s].meta.get('transformer_count')}",st.session_state[s].meta.get("transformer_brand"),delta_color="off")
+        panel_col.metric("Solarmodule",f"🔆 {get_standort(s).meta.get('module_count')}",get_standort(s).meta.get("module_brand"),delta_color="off")
+        transformer_col.metric("Wechselrichter",f"⚡ {get_standort(s).meta.get('transformer_count')}",get_standort(s).meta.get("transformer_brand"),delta_color="off")
    
 
     with col3:
@@ -47,9 +48,9 @@ for s in ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "t
         data_col3 = [sum(changes[:i]) for i in range(20)]
         delta = round(data_col3[-1], 2)
         try:
-            temp = st.session_state[s].load_total_power_of_day(date.today(),ttl_hash= int(datetime.now().timestamp() //300)).P_gesamt.to_numpy()
+            temp = total_power_of_day(s, date.today()).P_gesamt.to_numpy()
         
-            heutiger_ertrag = st.session_state[s].load_daily_yield_this_month()[date.today().day-1]
+            heutiger_ertrag = get_standort(s).load_daily_yield_this_month()[date.today().day-1]
             heutiger_ertrag_str = f"{heutiger_ertrag:,.1f}".replace(",", "X").replace(".", ",").replace("X", ".")
             if temp.shape[0]<2:
                 delta = 0
@@ -76,7 +77,7 @@ for s in ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "t
             print(e)
             st.error("🚨 Von heute sind leider keine Daten verfügbar!")
         a, b = st.columns(2)
-        ertrag = st.session_state[s].load_daily_yield_this_month()
+        ertrag = get_standort(s).load_daily_yield_this_month()
         ertrag_monat_sum = np.round(ertrag.sum(), 1)
         ertrag_monat_str = f"{ertrag_monat_sum:,.1f}".replace(",", "X").replace(".", ",").replace("X", ".")
         if ertrag_monat_sum !=0:
@@ -85,7 +86,7 @@ for s in ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "t
                 )
         else:
             a.error("🚨 Diesen Monat sind leider keine Daten verfügbar!")
-        ertrag = st.session_state[s].load_monthly_yield_this_year()
+        ertrag = get_standort(s).load_monthly_yield_this_year()
         ertrag_jahr_sum = np.round(ertrag.sum())
         ertrag_jahr_str = f"{ertrag_jahr_sum:,.1f}".replace(",", "X").replace(".", ",").replace("X", ".")
         if ertrag_jahr_sum !=0:
@@ -114,4 +115,4 @@ for s in ["muensingen", "karlsruhe", "badboll", "mettingen", "holzgerlingen", "t
 # from update_ertragsdaten import update_ertrag
 # # from update_leistungsdaten import update_leistung  
 # update_ertrag()
-#update_leistung()
\ No newline at end of file
+#update_leistung()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+from src import leistung
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Leeres Arbeitsverzeichnis: alle Tabellen und das Manifest (relative Pfade unter data/) landen in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(leistung, "_bootstrapped", set())
+    monkeypatch.setattr(leistung, "_writer", None)
+    monkeypatch.setattr(leistung, "_inflight", {})
+    return tmp_path
+
+
+def day_frame(standort: str, day: dt.date, wrs: int = 2, points: int = 12) -> pd.DataFrame:
+    """Tages-DataFrame im "long"-Format wie `Leistung.download_day_long`: P je WR alle 5 min ab 10 Uhr."""
+    start = dt.datetime.combine(day, dt.time(10))
+    rows = [
+        (start + dt.timedelta(minutes=5 * t), wr, -1, "P", float(100 * wr + t))
+        for wr in range(1, wrs + 1)
+        for t in range(points)
+    ]
+    df = pd.DataFrame(rows, columns=["Datetime", "wr", "string", "sensor", "value"])
+    df["standort"] = standort
+    return df
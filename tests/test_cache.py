@@ -0,0 +1,101 @@
+import datetime as dt
+import os
+import types
+
+import numpy as np
+import pytest
+
+from src import cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Steuerbare Uhr für `time.monotonic` und `date.today` im Cache-Modul."""
+    state = {"now": 1000.0, "today": dt.date(2025, 6, 21)}
+
+    class FakeDate(dt.date):
+        @classmethod
+        def today(cls):
+            return state["today"]
+
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: state["now"]))
+    monkeypatch.setattr(cache, "date", FakeDate)
+    return state
+
+
+def counting(**options):
+    calls = []
+
+    @cache.timed_cache(**options)
+    def load(key):
+        calls.append(key)
+        return np.zeros(125)  # 1000 Bytes
+
+    return load, calls
+
+
+def test_ttl_expiry(clock):
+    load, calls = counting(ttl=60)
+    load("a")
+    clock["now"] += 59
+    load("a")
+    assert calls == ["a"]
+    clock["now"] += 2
+    load("a")
+    assert calls == ["a", "a"]
+
+
+def test_daily_rollover_at_midnight(clock):
+    load, calls = counting(daily=True)
+    load("a")
+    load("a")
+    assert calls == ["a"]
+    clock["today"] += dt.timedelta(days=1)
+    load("a")
+    assert calls == ["a", "a"]
+
+
+def test_table_commit_invalidates(clock, tmp_path):
+    table = tmp_path / "table"
+    load, calls = counting(tables=str(table))
+    load("a")  # Tabelle gibt es noch nicht
+    os.makedirs(table / "_delta_log")
+    load("a")
+    assert calls == ["a", "a"]
+    load("a")
+    assert calls == ["a", "a"]
+    stat = os.stat(table / "_delta_log")
+    os.utime(table / "_delta_log", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    load("a")
+    assert calls == ["a", "a", "a"]
+
+
+def test_maxsize_evicts_least_recently_used(clock):
+    load, calls = counting(maxsize=2)
+    load("a")
+    load("b")
+    load("a")  # a ist jetzt jünger als b
+    load("c")
+    assert load.cache_info()["entries"] == 2
+    load("a")
+    load("b")
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_max_bytes_evicts(clock):
+    load, calls = counting(max_bytes=2500)
+    for key in "abc":
+        load(key)
+    info = load.cache_info()
+    assert info["entries"] == 2 and info["bytes"] == 2000
+    load("a")
+    assert calls == ["a", "b", "c", "a"]
+
+
+def test_cache_clear(clock):
+    load, calls = counting()
+    load("a")
+    load.cache_clear()
+    load("a")
+    assert calls == ["a", "a"]
+    assert load.cache_info()["hits"] == 0
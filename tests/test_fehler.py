@@ -0,0 +1,38 @@
+import datetime as dt
+
+import polars as pl
+
+from src import fehler, rollup
+
+
+def _power(standort: str, values: list) -> pl.DataFrame:
+    start = dt.datetime(2025, 6, 21, 12)
+    rows = [
+        (standort, start + dt.timedelta(minutes=5 * t), wr, value)
+        for wr, series in enumerate(values, start=1)
+        for t, value in enumerate(series)
+    ]
+    return pl.DataFrame(
+        rows, schema={"standort": pl.String, "Datetime": pl.Datetime("us"), "wr": pl.Int16, "value": pl.Float32},
+        orient="row",
+    ).with_columns(pl.col("Datetime").dt.date().alias("date"))
+
+
+def test_day_statistics_skips_site_without_values():
+    empty = _power("leer", [[None, None, None], [None, None, None]])
+    assert fehler.day_statistics(empty).is_empty()
+
+    ok = _power("badboll", [[0.0, 100.0, 200.0], [0.0, 110.0, 190.0]])
+    result = fehler.day_statistics(pl.concat([empty, ok]))
+    assert result["standort"].unique().to_list() == ["badboll"]
+    assert result["total_count"].to_list() == [2, 2]
+
+
+def test_errors_from_power_mixed_batch():
+    batch = pl.concat([
+        _power("leer", [[None, None]]),
+        _power("badboll", [[0.0, 100.0, 200.0], [0.0, 0.0, 190.0]]),
+    ])
+    errors = rollup.errors_from_power(batch.lazy())
+    assert errors.schema == pl.Schema(rollup.ERRORS_SCHEMA)
+    assert errors.filter(pl.col("wr") == 2)["zero_count"].to_list() == [1]
@@ -0,0 +1,118 @@
+import datetime as dt
+import sqlite3
+
+import pandas as pd
+import polars as pl
+
+from src import leistung as leistung_module, rollup
+from src.leistung import PATH_DELTA, Leistung, days_predicate
+from src.manifest import PATH_MANIFEST, STATUS_OK
+
+from conftest import day_frame
+
+DAY = dt.date(2025, 6, 21)
+
+
+def _manifest_rows() -> list:
+    with sqlite3.connect(PATH_MANIFEST) as con:
+        return con.execute("SELECT standort, date, status FROM ingest ORDER BY standort, date").fetchall()
+
+
+def _no_download(self, standort, date_str):
+    raise AssertionError(f"unerwarteter Download: {standort} {date_str}")
+
+
+def test_get_day_and_update_accepts_tz_aware_timestamp(store, monkeypatch):
+    leistung = Leistung()
+    leistung.write_frames([day_frame("badboll", DAY)])
+    before = _manifest_rows()
+    assert before == [("badboll", DAY.isoformat(), STATUS_OK)]
+
+    monkeypatch.setattr(Leistung, "download_day_long", _no_download)
+    lf = leistung.get_day_and_update("badboll", pd.Timestamp(DAY, tz="Europe/Berlin"))
+
+    assert lf.collect().height == 24
+    assert _manifest_rows() == before
+
+
+class _StuckWriter:
+    """Schreib-Dienst, dessen Commit noch aussteht."""
+
+    def __init__(self):
+        self.tables = []
+
+    def submit(self, table, timeout=None):
+        self.tables.append(table)
+
+
+def test_queued_day_is_not_downloaded_again(store, monkeypatch):
+    leistung = Leistung()
+    writer = _StuckWriter()
+    monkeypatch.setattr(leistung_module, "_writer", writer)
+    calls = []
+
+    def download(self, standort, date_str):
+        calls.append(date_str)
+        return day_frame(standort, DAY)
+
+    monkeypatch.setattr(Leistung, "download_day_long", download)
+    for _ in range(3):
+        assert leistung.get_day_and_update("badboll", DAY).collect().height == 24
+    assert calls == ["250621"]
+    assert len(writer.tables) == 1
+
+
+def test_submit_write_after_close_writes_synchronously(store):
+    leistung = Leistung()
+    leistung.writer().close()
+    leistung.submit_write(day_frame("badboll", DAY))
+
+    assert _manifest_rows() == [("badboll", DAY.isoformat(), STATUS_OK)]
+    assert leistung.get_day_and_update("badboll", DAY).collect().height == 24
+
+
+def test_days_predicate_merges_consecutive_days():
+    days = [dt.date(2025, 6, 30), dt.date(2025, 7, 1), dt.date(2025, 7, 3), dt.date(2025, 6, 30)]
+    assert days_predicate("badboll", days) == (
+        "standort = 'badboll' AND month IN ('2025-06', '2025-07') AND "
+        "((date >= '2025-06-30' AND date < '2025-07-02') OR (date >= '2025-07-03' AND date < '2025-07-04'))"
+    )
+
+
+def _counts() -> dict:
+    rows = pl.scan_delta(PATH_DELTA).group_by("standort", "date").len().collect()
+    return {(s, d): n for s, d, n in rows.iter_rows()}
+
+
+def test_write_tables_replaces_days_idempotently(store):
+    leistung = Leistung()
+    other = DAY + dt.timedelta(days=1)
+    leistung.write_frames([day_frame("badboll", DAY), day_frame("badboll", other), day_frame("karlsruhe", DAY)])
+    leistung.write_frames([day_frame("badboll", DAY)])
+    assert _counts() == {("badboll", DAY): 24, ("badboll", other): 24, ("karlsruhe", DAY): 24}
+
+    # ein kürzerer Stand ersetzt den Tag vollständig, andere Tage/Standorte bleiben
+    leistung.write_frames([day_frame("badboll", DAY, wrs=1, points=6)])
+    assert _counts() == {("badboll", DAY): 6, ("badboll", other): 24, ("karlsruhe", DAY): 24}
+    assert leistung.manifest.get("badboll", DAY)["rows"] == 6
+
+
+def test_update_rollups_backfills_failed_days(store, monkeypatch):
+    leistung = Leistung()
+    days = [DAY, DAY + dt.timedelta(days=10), DAY + dt.timedelta(days=11)]  # Juni und Juli
+
+    def broken(power):
+        raise RuntimeError("Rollup kaputt")
+
+    with monkeypatch.context() as m:
+        m.setattr(rollup, "update", broken)
+        leistung.write_frames([day_frame("badboll", d) for d in days])
+    assert leistung.manifest.missing_rollups() == {"badboll": days}
+    assert not rollup.exists(rollup.PATH_DAILY)
+
+    leistung.update_rollups(["badboll"])
+    assert leistung.manifest.missing_rollups() == {}
+    daily = pl.read_delta(rollup.PATH_DAILY).sort("date", "wr")
+    assert daily["date"].unique().to_list() == days
+    assert rollup.load_total_power("badboll", DAY) is not None
+    assert sorted(pl.read_delta(rollup.PATH_MONTHLY)["month"].unique()) == ["2025-06", "2025-07"]
@@ -0,0 +1,63 @@
+import datetime as dt
+
+import pytest
+
+from src.manifest import RETRY_POLICY, STATUS_FAILED, STATUS_OK, Manifest, backoff, is_due
+
+DAY = dt.date(2025, 6, 21)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return Manifest(str(tmp_path / "ingest.sqlite"))
+
+
+def test_backoff_doubles_up_to_cap():
+    first, cap = RETRY_POLICY["http"]
+    assert backoff("http", 1) == first
+    assert backoff("http", 2) == 2 * first
+    assert backoff("http", 3) == 4 * first
+    assert backoff("http", 50) == cap
+
+
+def test_backoff_unknown_reason_uses_default():
+    assert backoff("gibt-es-nicht", 1) == RETRY_POLICY["unknown"][0]
+
+
+def test_is_due():
+    now = dt.datetime(2025, 6, 21, 12)
+    failed = {"status": STATUS_FAILED, "retry_after": "2025-06-21T13:00:00"}
+    assert not is_due(failed, now)
+    assert is_due(failed, now + dt.timedelta(hours=1))
+    assert is_due({"status": STATUS_FAILED, "retry_after": None}, now)
+    assert not is_due({"status": STATUS_OK, "retry_after": None}, now)
+    assert not is_due(None, now)
+
+
+def test_record_failure_counts_attempts(manifest):
+    first = manifest.record_failure("badboll", DAY, "404", "missing")
+    assert first["attempts"] == 1
+    second = manifest.record_failure("badboll", DAY, "404", "missing")
+    assert second["attempts"] == 2
+    delay = dt.datetime.fromisoformat(second["retry_after"]) - dt.datetime.fromisoformat(second["fetched_at"])
+    assert delay == backoff("missing", 2)
+
+    # ein erfolgreicher Commit setzt die Zählung zurück
+    manifest.record_ok([("badboll", DAY, 10)])
+    assert manifest.get("badboll", DAY)["attempts"] == 0
+    assert manifest.record_failure("badboll", DAY, "500", "http")["attempts"] == 1
+
+
+def test_missing_rollups(manifest):
+    other = DAY + dt.timedelta(days=1)
+    manifest.record_ok([("badboll", DAY, 10), ("badboll", other, 10), ("karlsruhe", DAY, 10)])
+    manifest.record_failure("karlsruhe", other, "404", "missing")
+    assert manifest.missing_rollups() == {"badboll": [DAY, other], "karlsruhe": [DAY]}
+
+    manifest.record_rollup([("badboll", DAY), ("karlsruhe", DAY)])
+    assert manifest.missing_rollups() == {"badboll": [other]}
+    assert manifest.missing_rollups(["karlsruhe"]) == {}
+
+    # neu geschriebener Tag: Rollups wieder offen
+    manifest.record_ok([("karlsruhe", DAY, 12)])
+    assert manifest.missing_rollups(["karlsruhe"]) == {"karlsruhe": [DAY]}